@@ -0,0 +1,98 @@
+import time
+
+import pygame
+from pygame.locals import RLEACCEL
+
+# Every image the game uses, decoded once at startup
+# name: (file, colorkey, per-pixel alpha)
+IMAGES = {
+    "jet": ("jet.png", (255, 255, 255), False),
+    "paper_plane": ("paper_plane.png", (255, 255, 255), True),
+    "cloud": ("cloud.png", (0, 0, 0), False),
+    "player_missile": ("player_missile.png", (0, 0, 0), False),
+    "explosion": ("explosion.png", (0, 0, 0), False),
+    "spitfire_gunner": ("spitfire_gunner.png", (255, 255, 255), False),
+    "boss": ("boss.png", None, True),
+    "boss_attack1": ("boss_attack1.png", (255, 255, 255), False),
+    "health": ("health.png", (0, 0, 0), False),
+    "ammo": ("ammo.png", (0, 0, 0), False),
+    "healthbar": ("healthbar.png", None, True),
+}
+
+
+def decode(filename):
+    """ Decodes an image file, returns (surface, ms taken), safe to run on a worker thread """
+    begin = time.perf_counter()
+    surf = pygame.image.load(filename)
+    return surf, (time.perf_counter() - begin) * 1000
+
+
+class AssetRegistry:
+    """ Decodes, converts and colorkeys images once and hands out shared surfaces and masks
+
+    load_all() does everything on the calling thread. start_loading() instead
+    hands the file decoding to an executor, so it can run while the window
+    opens, and finish_loading() converts the results once the display is set.
+    """
+    def __init__(self):
+        self.images = {}
+        self.masks = {}
+        self.stats = {} # name: (load time in ms, surface bytes, mask bytes)
+        self.pending = {} # name: (decode future, colorkey, alpha)
+
+    def load(self, name, filename, colorkey=None, alpha=False):
+        """ Loads a single image, requires the display mode to be set """
+        return self.prepare(name, *decode(filename), colorkey, alpha)
+
+    def prepare(self, name, surf, decode_ms=0, colorkey=None, alpha=False):
+        """ Converts a decoded image for the display and builds its mask """
+        begin = time.perf_counter()
+        surf = surf.convert_alpha() if alpha else surf.convert()
+        if colorkey is not None:
+            surf.set_colorkey(colorkey, RLEACCEL)
+        mask = pygame.mask.from_surface(surf)
+        return self.add(name, surf, mask, decode_ms + (time.perf_counter() - begin) * 1000)
+
+    def add(self, name, surf, mask, elapsed=0):
+        """ Registers a ready surface and its mask, elapsed is the ms it took to load """
+        width, height = surf.get_size()
+        self.images[name] = surf
+        self.masks[name] = mask
+        # Masks are stored as one bit per pixel
+        self.stats[name] = (elapsed, surf.get_pitch() * height, (width * height + 7) // 8)
+        return surf
+
+    def load_all(self, table=IMAGES):
+        """ Loads every image in the table """
+        for name, (filename, colorkey, alpha) in table.items():
+            self.load(name, filename, colorkey, alpha)
+
+    def start_loading(self, executor, table=IMAGES):
+        """ Queues every image in the table for decoding on the executor """
+        for name, (filename, colorkey, alpha) in table.items():
+            self.pending[name] = (executor.submit(decode, filename), colorkey, alpha)
+
+    def finish_loading(self):
+        """ Waits for the queued decodes and converts them, requires the display mode to be set """
+        for name, (future, colorkey, alpha) in self.pending.items():
+            self.prepare(name, *future.result(), colorkey, alpha)
+        self.pending = {}
+
+    def image(self, name):
+        """ Returns the shared surface for an image, never modify it in place """
+        return self.images[name]
+
+    def mask(self, name):
+        """ Returns the precomputed collision mask for an image """
+        return self.masks[name]
+
+    def report(self):
+        """ Returns a table of load time and memory per asset """
+        lines = [f"{'asset':<18}{'load ms':>9}{'surface KB':>12}{'mask KB':>9}"]
+        total_ms = total_bytes = 0
+        for name, (elapsed, surf_bytes, mask_bytes) in self.stats.items():
+            lines.append(f"{name:<18}{elapsed:>9.2f}{surf_bytes / 1024:>12.1f}{mask_bytes / 1024:>9.1f}")
+            total_ms += elapsed
+            total_bytes += surf_bytes + mask_bytes
+        lines.append(f"{'total':<18}{total_ms:>9.2f}{total_bytes / 1024:>12.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,180 @@
+""" Packs every sprite into one atlas cached on disk with its collision masks
+
+The cache holds the raw RGBA pixels of the atlas and a one byte per pixel
+collision mask plane, so loading it memory-maps the file and decodes no PNGs.
+Images without per-pixel alpha are packed above the ones with it, each part
+is converted for the display once and sprites are subsurfaces of it, apart
+from colorkeyed ones, which get their own RLE-accelerated copy. The
+cache is rebuilt when it is missing, older than an image or made from a
+different image table. Usage:
+
+    python atlas.py [--out sprites.atlas]
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+
+import pygame
+from pygame.locals import RLEACCEL
+
+from assets import IMAGES, AssetRegistry
+
+CACHE_PATH = "sprites.atlas"
+MAGIC = b"PYATL1"
+# Magic, table checksum, atlas width, atlas height, first row of the alpha part, number of images
+HEADER = struct.Struct("<6sIHHHH")
+# Name, x, y, width, height, has colorkey, alpha, colorkey
+ENTRY = struct.Struct("<24sHHHH??3B")
+WIDTH = 512 # Widest image plus room to share rows
+
+
+def checksum(table):
+    """ Identifies a table of images, a changed table invalidates the cache """
+    return zlib.crc32(repr(sorted(table.items())).encode())
+
+
+def pack(sizes, width=WIDTH, top=0):
+    """ Shelf-packs (name, (width, height)) tallest first, returns {name: (x, y)} and the height used """
+    positions = {}
+    x = y = shelf = 0
+    for name, (w, h) in sorted(sizes, key=lambda item: -item[1][1]):
+        if x + w > width:
+            x, y = 0, y + shelf
+            shelf = 0
+        positions[name] = (x, top + y)
+        x += w
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+
+def build(table=IMAGES, path=CACHE_PATH, width=WIDTH):
+    """ Decodes every image and writes the atlas cache, requires the display mode to be set
+
+    The images go through AssetRegistry, so the cached pixels and masks are
+    exactly what loading the PNGs one by one would give.
+    """
+    registry = AssetRegistry()
+    registry.load_all(table)
+    surfaces = registry.images
+    width = max(width, *(surf.get_width() for surf in surfaces.values()))
+
+    opaque = [(name, surfaces[name].get_size()) for name, (_, _, alpha) in table.items() if not alpha]
+    translucent = [(name, surfaces[name].get_size()) for name, (_, _, alpha) in table.items() if alpha]
+    positions, split = pack(opaque, width)
+    more, height = pack(translucent, width, split)
+    positions.update(more)
+    height += split
+
+    pixels = bytearray(width * height * 4)
+    plane = bytearray(width * height)
+    entries = []
+    for name, (filename, colorkey, alpha) in table.items():
+        surf = surfaces[name]
+        x, y = positions[name]
+        w, h = surf.get_size()
+        # tostring() reports the alpha of keyed pixels differently, the key is stored separately anyway
+        surf.set_colorkey(None)
+        rgba = pygame.image.tostring(surf, "RGBA")
+        bits = pygame.image.tostring(registry.mask(name).to_surface(), "RGBA")[::4] # 255 where set
+        for row in range(h):
+            start = (y + row) * width + x
+            pixels[start * 4:(start + w) * 4] = rgba[row * w * 4:(row + 1) * w * 4]
+            plane[start:start + w] = bits[row * w:(row + 1) * w]
+        entries.append(ENTRY.pack(name.encode(), x, y, w, h, colorkey is not None, alpha, *(colorkey or (0, 0, 0))))
+
+    # Write next to the cache and swap it in, so a reader never sees half a file
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        file.write(HEADER.pack(MAGIC, checksum(table), width, height, split, len(entries)))
+        file.write(b"".join(entries))
+        file.write(pixels)
+        file.write(plane)
+    os.replace(temp, path)
+
+
+def is_stale(table=IMAGES, path=CACHE_PATH):
+    """ True if the cache is missing, older than an image or made from another table """
+    try:
+        built = os.path.getmtime(path)
+        with open(path, "rb") as file:
+            magic, crc, *_ = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return True
+    if magic != MAGIC or crc != checksum(table):
+        return True
+    return any(os.path.getmtime(filename) > built for filename, _, _ in table.values())
+
+
+def load(path=CACHE_PATH):
+    """ Reads the cache, returns {name: surface}, {name: mask} and the pages, requires the display mode to be set """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        magic, _, width, height, split, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a sprite atlas")
+        offset = HEADER.size
+        entries = [ENTRY.unpack_from(data, offset + index * ENTRY.size) for index in range(count)]
+        offset += count * ENTRY.size
+        size = width * height
+
+        raw = pygame.image.frombuffer(view[offset:offset + size * 4], (width, height), "RGBA")
+        pages = (
+            raw.subsurface(0, 0, width, split).convert(),
+            raw.subsurface(0, split, width, height - split).convert_alpha(),
+        )
+        plane = pygame.image.frombuffer(view[offset + size * 4:offset + size * 5], (width, height), "P")
+        plane.set_colorkey(0)
+        atlas_mask = pygame.mask.from_surface(plane)
+        # The surfaces borrow the mapped memory until they are gone
+        del raw, plane
+        view.release()
+
+    images = {}
+    masks = {}
+    for name, x, y, w, h, keyed, alpha, *colorkey in entries:
+        name = name.rstrip(b"\0").decode()
+        page, top = (pages[1], split) if alpha else (pages[0], 0)
+        surf = page.subsurface(x, y - top, w, h)
+        if keyed:
+            # Subsurfaces share their parent's pixels, which rules out RLEACCEL,
+            # and keyed blits without it are several times slower
+            surf = surf.copy()
+            surf.set_colorkey(tuple(colorkey), RLEACCEL)
+        mask = pygame.mask.Mask((w, h))
+        mask.draw(atlas_mask, (-x, -y))
+        images[name] = surf
+        masks[name] = mask
+    return images, masks, pages
+
+
+def fill(registry, path=CACHE_PATH, table=IMAGES):
+    """ Loads the atlas into an AssetRegistry, building the cache first if it is stale """
+    begin = time.perf_counter()
+    if is_stale(table, path):
+        build(table, path)
+    images, masks, _ = load(path)
+    # Loading is one step for all images, so each is charged an equal share
+    elapsed = (time.perf_counter() - begin) * 1000 / len(images)
+    for name, surf in images.items():
+        registry.add(name, surf, masks[name], elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=CACHE_PATH)
+    args = parser.parse_args()
+
+    # Converting the images needs a display mode, a hidden one will do
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    begin = time.perf_counter()
+    build(IMAGES, args.out)
+    print(f"packed {len(IMAGES)} images into {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB) "
+          f"in {(time.perf_counter() - begin) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
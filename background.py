@@ -0,0 +1,120 @@
+""" Pre-rendered sky and cloud layers that scroll at their own speeds
+
+Every layer is a screen-sized surface drawn once at startup that tiles
+seamlessly from its right edge to its left. Drawing a layer blits it twice,
+at its scroll offset and one tile to the right of that, and the screen clips
+each blit to the slice that shows. A flat sky is left to a fill, which
+is cheaper than any blit, and every cloud depth is one colorkeyed layer over
+it. A gradient sky only changes from top to bottom, so the farthest clouds
+are baked into it and it becomes one opaque layer, at about twice the cost
+of the fill. Far clouds are smaller, slower and faded into the sky behind
+them, which is done to the pixels up front as that sky never changes under
+them.
+"""
+import random
+
+import pygame
+from pygame.locals import RLEACCEL
+
+# Cloud depths from far to near: clouds per screen width, size, speed in
+# pixels per second and how much of the sky shows through them
+CLOUD_LAYERS = (
+    (7, 0.4, 40, 0.6),
+    (5, 0.65, 120, 0.35),
+    (3, 1, 300, 0),
+)
+# The see-through pixels of the cloud layers
+COLORKEY = (0, 0, 0)
+
+
+class ParallaxBackground:
+    """ The sky and its clouds, drawn from the scroll time instead of as sprites
+
+    layers holds (surface, pixels per second) from far to near. color is
+    the flat sky to fill the screen with before drawing them, or None for a
+    gradient, whose first layer is opaque and covers the screen. Cloud
+    positions come from their own generator seeded with seed, the game's
+    random numbers are left alone.
+    """
+    def __init__(self, size, top_color, bottom_color, cloud, cloud_layers=CLOUD_LAYERS, seed=0):
+        self.width, self.height = size
+        rng = random.Random(seed)
+        self.color = tuple(top_color) if tuple(top_color) == tuple(bottom_color) else None
+        self.sky = self.gradient(top_color, bottom_color)
+        self.layers = []
+        for count, scale, speed, fade in cloud_layers:
+            width, height = cloud.get_size()
+            # Smoothing would blend the colorkey into the edges
+            image = pygame.transform.scale(cloud, (round(width * scale), round(height * scale)))
+            if self.layers or self.color is not None:
+                layer = self.surface()
+                layer.fill(COLORKEY)
+                layer.set_colorkey(COLORKEY, RLEACCEL)
+            else:
+                layer = self.sky.copy()
+            self.scatter(layer, image, count, fade, rng)
+            self.layers.append((layer, speed))
+        if self.color is None and not cloud_layers:
+            self.layers.append((self.sky, 0))
+
+    def surface(self, size=None):
+        """ Returns a new surface in the display's pixel format, screen-sized by default """
+        return pygame.Surface(size or (self.width, self.height), 0, pygame.display.get_surface())
+
+    def gradient(self, top_color, bottom_color):
+        """ Returns the sky, top_color at the top blending into bottom_color at the bottom, None when flat """
+        if self.color is not None:
+            return None
+        column = pygame.Surface((1, self.height))
+        last = max(1, self.height - 1)
+        for y in range(self.height):
+            column.set_at((0, y), [round(top + (bottom - top) * y / last) for top, bottom in zip(top_color, bottom_color)])
+        return pygame.transform.scale(column, (self.width, self.height)).convert()
+
+    def scatter(self, layer, image, count, fade, rng):
+        """ Draws count clouds spread evenly across a layer, fade of the sky showing through them """
+        width, height = image.get_size()
+        shape = pygame.mask.from_surface(image)
+        for index in range(count):
+            x = round((index + rng.random()) * self.width / count)
+            y = rng.randrange(max(1, self.height - height))
+            cloud = image
+            if fade:
+                # Mixed with the sky behind it, which scrolls along with it
+                if self.sky is None:
+                    behind = self.surface((width, height))
+                    behind.fill(self.color)
+                else:
+                    behind = self.sky.subsurface((0, y, width, height)).copy()
+                image.set_alpha(round(255 * (1 - fade)))
+                behind.blit(image, (0, 0))
+                image.set_alpha(None)
+                cloud = shape.to_surface(behind, setsurface=behind, unsetcolor=COLORKEY)
+                cloud.set_colorkey(COLORKEY)
+            layer.blit(cloud, (x, y))
+            # Clouds over the right edge go on at the left, so the layer tiles
+            if x + width > self.width:
+                layer.blit(cloud, (x - self.width, y))
+
+    def draw(self, blit, seconds, depth=None):
+        """ Blits the layers as they are seconds into the game, only the first depth layers if given
+
+        The screen has to be filled with color first unless it is None.
+        """
+        width = self.width
+        for layer, speed in self.layers[:depth]:
+            offset = round(seconds * speed) % width
+            blit(layer, (-offset, 0))
+            if offset:
+                blit(layer, (width - offset, 0))
+
+    def still(self):
+        """ Returns every layer at rest on one opaque surface, for drawing that can't scroll """
+        if self.sky is None:
+            surf = self.surface()
+            surf.fill(self.color)
+        else:
+            surf = self.sky.copy()
+        for layer, _ in self.layers:
+            surf.blit(layer, (0, 0))
+        return surf
@@ -0,0 +1,121 @@
+""" Plays many seeded headless games on a process pool and summarizes them
+
+Every game uses its own seed, so a batch is reproducible. Gameplay constants
+of py_tut_with_images can be overridden to compare tunings. Usage:
+
+    python batch.py --games 2000 --policy random --set BOSS_HEALTH=30 --set GUNNER_CAP=4
+"""
+import argparse
+import os
+import statistics
+import time
+from multiprocessing import Pool
+
+import headless
+import py_tut_with_images as game
+
+# Constants that --set may override
+TUNABLE = ("BOSS_HEALTH", "BOSS_SCORE", "GUNNER_CAP", "GUNNER_INTERVAL", "POWERUP_ROLL", "ENEMY_INTERVAL")
+
+
+def configure(overrides):
+    """ Worker initializer, applies the tuning overrides to the game module """
+    # SDL turns SIGTERM into a QUIT event, which would keep the pool from
+    # stopping its workers
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    for name, value in overrides.items():
+        setattr(game, name, value)
+
+
+def play(job):
+    """ Plays one game in a worker and returns its result """
+    seed, policy, frames = job
+    result = headless.run(frames, seed, policy)
+    return {
+        "seed": seed,
+        "score": result["score"],
+        "survival": result["sim_seconds"],
+        "boss_kill": result["won"],
+        "frames": result["frames"],
+    }
+
+
+def summarize(results, elapsed):
+    """ Returns summary statistics of a list of game results """
+    scores = [result["score"] for result in results]
+    survival = [result["survival"] for result in results]
+    frames = sum(result["frames"] for result in results)
+    return {
+        "games": len(results),
+        "score_mean": statistics.mean(scores),
+        "score_median": statistics.median(scores),
+        "score_stdev": statistics.pstdev(scores),
+        "score_max": max(scores),
+        "survival_mean": statistics.mean(survival),
+        "survival_median": statistics.median(survival),
+        "boss_kill_rate": sum(result["boss_kill"] for result in results) / len(results),
+        "frames": frames,
+        "games_per_second": len(results) / elapsed,
+        "frames_per_second": frames / elapsed,
+    }
+
+
+def run_batch(games, policy="random", frames=36000, workers=None, first_seed=0, overrides=None, on_result=None):
+    """ Plays games seeded first_seed onwards and returns (results, summary)
+
+    on_result is called in the parent with every result as soon as it arrives.
+    """
+    workers = workers or os.cpu_count()
+    jobs = [(seed, policy, frames) for seed in range(first_seed, first_seed + games)]
+    # Hand out several games per task to keep the pipe overhead low
+    chunksize = max(1, min(32, games // (workers * 8)))
+    results = []
+    begin = time.perf_counter()
+    pool = Pool(workers, initializer=configure, initargs=(overrides or {},))
+    try:
+        for result in pool.imap_unordered(play, jobs, chunksize):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    elapsed = time.perf_counter() - begin
+    results.sort(key=lambda result: result["seed"])
+    return results, summarize(results, elapsed)
+
+
+def parse_override(text):
+    name, _, value = text.partition("=")
+    if name not in TUNABLE:
+        raise argparse.ArgumentTypeError(f"{name} is not one of {', '.join(TUNABLE)}")
+    return name, int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(headless.POLICIES), default="random")
+    parser.add_argument("--frames", type=int, default=36000, help="most frames per game")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to one per core")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--set", type=parse_override, action="append", default=[], metavar="NAME=VALUE",
+                        help="override a gameplay constant")
+    parser.add_argument("--progress", action="store_true", help="print every game as it finishes")
+    args = parser.parse_args()
+
+    def report(result):
+        print(f"seed {result['seed']}: score {result['score']}, survived {result['survival']:.1f} s"
+              + (", killed the boss" if result["boss_kill"] else ""))
+
+    _, summary = run_batch(args.games, args.policy, args.frames, args.workers, args.first_seed,
+                           dict(args.set), report if args.progress else None)
+    for name, value in summary.items():
+        print(f"{name:<18}{value:.3f}" if isinstance(value, float) else f"{name:<18}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+""" Compares the cost of the parallax background with a filled sky and cloud sprites
+
+The sprite cases fill the sky and move and blit every cloud on their own,
+the way the game drew clouds before they became background layers: a few
+full-size clouds as it used to spawn them, and as many as the layers hold
+at their three sizes. The layer cases draw a flat and a gradient sky with
+the same clouds. Usage:
+
+    python benchmarks/bench_background.py [--frames 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import pygame
+
+import background
+import py_tut_with_images as game
+
+GRADIENT_TOP = (70, 140, 225)
+
+
+def sprite_clouds(scales):
+    """ Returns [surface, rect, speed] for one cloud sprite per scale and layer speed """
+    cloud = game.asset_registry.image("cloud")
+    sprites = []
+    for index, (scale, speed) in enumerate(scales):
+        width, height = cloud.get_size()
+        surf = pygame.transform.scale(cloud, (round(width * scale), round(height * scale)))
+        rect = surf.get_rect(topleft=(index * 97 % game.SCREEN_WIDTH, index * 61 % game.SCREEN_HEIGHT))
+        sprites.append([surf, rect, speed / game.SIM_RATE])
+    return sprites
+
+
+def sprites_frame(sprites):
+    """ One frame of the old way, fill, move and blit every cloud """
+    screen = game.screen
+    screen.fill(game.SKY_COLOR)
+    for surf, rect, speed in sprites:
+        rect.x = round(rect.x - speed)
+        if rect.right < 0:
+            rect.left = game.SCREEN_WIDTH
+        screen.blit(surf, rect)
+
+
+def layers_frame(layers, seconds):
+    """ One frame of the layers, filling first when the sky is flat """
+    if layers.color is not None:
+        game.screen.fill(layers.color)
+    layers.draw(game.screen.blit, seconds)
+
+
+def timed(frame, frames):
+    """ Returns the mean ms per frame """
+    begin = time.perf_counter()
+    for index in range(frames):
+        frame(index)
+    return (time.perf_counter() - begin) * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    game.init_game(headless=True, seed=0)
+    cloud = game.asset_registry.image("cloud")
+    flat = background.ParallaxBackground((game.SCREEN_WIDTH, game.SCREEN_HEIGHT), game.SKY_COLOR, game.SKY_COLOR, cloud)
+    gradient = background.ParallaxBackground((game.SCREEN_WIDTH, game.SCREEN_HEIGHT), GRADIENT_TOP, game.SKY_COLOR,
+                                             cloud)
+    # The game used to spawn a cloud a second that took about three to cross
+    few = sprite_clouds([(1, 300)] * 3)
+    many = sprite_clouds([(scale, speed) for count, scale, speed, _ in background.CLOUD_LAYERS
+                          for _ in range(count)])
+    seconds = lambda index: index / game.SIM_RATE
+
+    print(f"{'background':<28}{'clouds':>7}{'ms/frame':>10}")
+    cases = (
+        ("fill and cloud sprites", len(few), lambda index: sprites_frame(few)),
+        ("fill and cloud sprites", len(many), lambda index: sprites_frame(many)),
+        ("flat sky and layers", len(many), lambda index: layers_frame(flat, seconds(index))),
+        ("gradient sky and layers", len(many), lambda index: layers_frame(gradient, seconds(index))),
+    )
+    for name, clouds, frame in cases:
+        print(f"{name:<28}{clouds:>7}{timed(frame, args.frames):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
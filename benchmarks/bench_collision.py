@@ -0,0 +1,75 @@
+""" Compares brute-force, spatial-hash and default collision checks
+
+Half the entities are bullets and half are enemies, scattered over the
+screen. The hash column always builds the hash, default is what the game
+does and only builds it above HASH_PAIRS_PER_SPRITE. Every path must find
+the same hits. Usage:
+
+    python benchmarks/bench_collision.py [--counts 10 100 1000 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import pygame
+
+from collision import HASH_PAIRS_PER_SPRITE, SpatialHash
+
+
+def make_group(count, size, rng):
+    group = pygame.sprite.Group()
+    for _ in range(count):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect(rng.randint(0, 800 - size[0]), rng.randint(0, 600 - size[1]), *size)
+        group.add(sprite)
+    return group
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grids = {"hash": SpatialHash(pairs_per_sprite=0), "default": SpatialHash()}
+    print(f"{'entities':>9}{'brute ms':>11}{'hash ms':>10}{'speedup':>9}{'default ms':>12}{'speedup':>9}{'hits':>9}"
+          f"   (hash above {HASH_PAIRS_PER_SPRITE} pairs per sprite)")
+    for count in args.counts:
+        bullets = make_group(count // 2, (30, 17), rng)
+        enemies = make_group(count - count // 2, (44, 38), rng)
+
+        def brute():
+            return pygame.sprite.groupcollide(bullets, enemies, False, False)
+
+        def hashed(grid):
+            # Rebuilding is part of every frame's cost
+            grid.rebuild(enemies)
+            return grid.groupcollide(bullets, enemies, False, False)
+
+        brute_time, expected = best_time(brute, args.repeat)
+        row = f"{count:>9}{brute_time * 1000:>11.2f}"
+        for name, grid in grids.items():
+            elapsed, found = best_time(lambda: hashed(grid), args.repeat)
+            assert {k: set(v) for k, v in expected.items()} == {k: set(v) for k, v in found.items()}
+            row += f"{elapsed * 1000:>{10 if name == 'hash' else 12}.2f}{brute_time / elapsed:>8.1f}x"
+        hits = sum(len(v) for v in expected.values())
+        print(f"{row}{hits:>9}")
+
+
+if __name__ == "__main__":
+    main()
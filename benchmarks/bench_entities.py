@@ -0,0 +1,46 @@
+""" Compares per-sprite updates with the NumPy entity store
+
+Keeps a fixed number of enemies alive, respawning the ones that fly off
+screen, and times the enemy update for a number of frames. Usage:
+
+    python benchmarks/bench_entities.py [--counts 100 1000 5000] [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import py_tut_with_images as game
+
+
+def time_updates(count, frames, vectorized):
+    """ Returns the average milliseconds per frame spent moving count enemies """
+    game.init_game(headless=True, seed=0, vectorized=vectorized)
+    elapsed = 0
+    for _ in range(frames):
+        for _ in range(count - len(game.enemies)):
+            game.enemy_pool.acquire()
+        begin = time.perf_counter()
+        game.update_group(game.enemies)
+        elapsed += time.perf_counter() - begin
+    return elapsed / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8}{'sprite ms':>11}{'numpy ms':>10}{'speedup':>9}")
+    for count in args.counts:
+        sprite_ms = time_updates(count, args.frames, False)
+        numpy_ms = time_updates(count, args.frames, True)
+        print(f"{count:>8}{sprite_ms:>11.3f}{numpy_ms:>10.3f}{sprite_ms / numpy_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
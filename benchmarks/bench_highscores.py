@@ -0,0 +1,79 @@
+""" Times the high score store against record files of growing size
+
+For each count a record file of that many games is written straight to
+disk, then the store is opened without an index, which scans every record
+and writes the index, and again with it, which only reads the best
+scores. add is what the game does at a game over, add() and the table for
+the score screen, sync is close() writing and syncing what those adds
+queued. Usage:
+
+    python benchmarks/bench_highscores.py [--counts 10000 100000 1000000] [--adds 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import highscores
+import py_tut_with_images as game
+
+# Records packed at a time while filling a file
+CHUNK = 65536
+
+
+def fill(path, count, rng):
+    """ Writes a record file of count games a second apart """
+    kiosk = highscores.kiosk_name()
+    with open(path, "wb") as file:
+        file.write(highscores.MAGIC)
+        for first in range(0, count, CHUNK):
+            file.write(b"".join(highscores.RECORD.pack(stamp, rng.randrange(10000), False, kiosk)
+                                for stamp in range(first, min(count, first + CHUNK))))
+
+
+def opened(path):
+    """ Returns ms to open the store, which is closed again """
+    begin = time.perf_counter()
+    scores = highscores.HighScores(path, game.TOP_SCORES)
+    elapsed = (time.perf_counter() - begin) * 1000
+    scores.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--adds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'records':>9}{'MB':>7}{'scan ms':>9}{'index ms':>10}{'add us':>8}{'sync ms':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            path = os.path.join(directory, f"{count}.dat")
+            fill(path, count, rng)
+            size = os.path.getsize(path) / 2 ** 20
+            scan = opened(path)
+            index = opened(path)
+
+            scores = highscores.HighScores(path, game.TOP_SCORES)
+            begin = time.perf_counter()
+            for _ in range(args.adds):
+                scores.add(rng.randrange(10000))
+                scores.top(game.SCORE_TABLE)
+            add = (time.perf_counter() - begin) * 1e6 / args.adds
+            begin = time.perf_counter()
+            scores.close()
+            sync = (time.perf_counter() - begin) * 1000
+            assert scores.written == args.adds
+            print(f"{count:>9}{size:>7.1f}{scan:>9.1f}{index:>10.2f}{add:>8.2f}{sync:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
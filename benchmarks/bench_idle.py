@@ -0,0 +1,114 @@
+""" Measures the CPU the game uses while it sits on the score screen or is paused
+
+Each case runs for a few seconds of wall time with the spawn timers set up
+like in a windowed game and reports process CPU time over wall time. The
+polling case is the score screen as it used to be, redrawn and flipped 10
+times a second while the timers kept firing, and playing is the running
+game at 60 FPS for comparison. On video drivers SDL can't sleep on, like
+the dummy one, the idle screens poll 20 times a second. Sleeping is the
+floor, what SDL's audio and timer threads cost with the game doing nothing.
+Usage:
+
+    python benchmarks/bench_idle.py [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import pygame
+from pygame.locals import K_RETURN, K_p, KEYDOWN
+
+import py_tut_with_images as game
+import scorescreen
+from controls import PressedKeys
+
+
+def start(seconds, key=None):
+    """ Starts a game with the spawn timers of a windowed one, key is pressed seconds later """
+    game.init_game(headless=True, seed=0)
+    game.spawn_timers = True
+    game.set_idle(False)
+    if key is not None:
+        pygame.time.set_timer(pygame.event.Event(KEYDOWN, key=key), round(seconds * 1000), 1)
+
+
+def cpu_percent(function):
+    """ Runs function and returns the CPU time it took as a share of the wall time """
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    function()
+    return (time.process_time() - cpu) * 100 / (time.perf_counter() - wall)
+
+
+def polling(seconds):
+    """ The old score screen, drawn and flipped 10 times a second """
+    start(seconds)
+    clock = pygame.time.Clock()
+    screen = game.renderer.canvas()
+
+    def run():
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pygame.event.get()
+            scorescreen.draw_screen(screen, 120, False)
+            game.renderer.show_canvas()
+            clock.tick(10)
+    return run
+
+
+def score_screen(seconds):
+    start(seconds, K_RETURN)
+
+    def run():
+        game.set_idle(True)
+        scorescreen.display_screen(game.renderer.canvas(), 120, False, game.renderer.show_canvas)
+        game.set_idle(False)
+    return run
+
+
+def paused(seconds):
+    start(seconds, K_p)
+    return game.pause
+
+
+def sleeping(seconds):
+    """ The floor, the process does nothing but its audio and timer threads keep going """
+    start(seconds)
+    game.set_idle(True)
+    return lambda: time.sleep(seconds)
+
+
+def playing(seconds):
+    """ The game itself at 60 FPS """
+    start(seconds)
+    clock = pygame.time.Clock()
+    keys = PressedKeys(0)
+
+    def run():
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            game.run_tick(keys, pygame.event.get())
+            game.draw_world()
+            game.renderer.present()
+            clock.tick(60)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"video driver: {os.environ.get('SDL_VIDEODRIVER', 'default')}")
+    print(f"{'case':>22}{'CPU %':>8}")
+    for name, case in (("playing", playing), ("score screen, polling", polling),
+                       ("score screen, waiting", score_screen), ("paused", paused), ("sleeping", sleeping)):
+        print(f"{name:>22}{cpu_percent(case(args.seconds)):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+""" Compares rect, per-sprite mask and occupancy mask collision checks
+
+Scatters the game's own enemies and bullets, the player and the boss over
+the screen again for every frame and runs the game's hit tests on them:
+player against enemies, bullets against enemies and the boss against
+bullets. The rect path is what the game does by default, mask runs
+collide_mask on the sprites the spatial hash pairs up and occupancy asks a
+frame-sized mask per group first. Mask and occupancy must find the same
+hits, the hits rect finds beyond those are on transparent pixels. The
+scattered scenes are far more crowded than a game, so the second table
+times the collision phases of real headless games in each mode. Usage:
+
+    python benchmarks/bench_occupancy.py [--counts 10 100 1000] [--frames 200] [--games 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import pygame
+
+import headless
+import py_tut_with_images as game
+from collision import OccupancyMask, SpatialHash
+from profiler import FrameProfiler
+
+SIZE = (game.SCREEN_WIDTH, game.SCREEN_HEIGHT)
+PATHS = {
+    "rect": lambda: (SpatialHash(), SpatialHash()),
+    "mask": lambda: (SpatialHash(collided=pygame.sprite.collide_mask),
+                     SpatialHash(collided=pygame.sprite.collide_mask)),
+    "occupancy": lambda: (OccupancyMask(SIZE), OccupancyMask(SIZE)),
+}
+
+
+def populate(count):
+    """ Starts a game holding count enemies, a tenth as many bullets and the boss """
+    game.init_game(headless=True, seed=0)
+    for _ in range(count):
+        game.enemy_pool.acquire()
+    for _ in range(max(1, count // 10)):
+        game.bullet_pool.acquire((0, 0), 5)
+    boss = game.Boss(0, 0, False, game.BOSS_HEALTH)
+    game.boss.add(boss)
+    return boss
+
+
+def scatter(rng, boss):
+    """ Moves every sprite to a random spot on the screen """
+    for sprite in [game.player, boss, *game.enemies, *game.bullets]:
+        sprite.rect.center = (rng.randrange(game.SCREEN_WIDTH), rng.randrange(game.SCREEN_HEIGHT))
+
+
+def check(enemy_grid, bullet_grid, boss):
+    """ One frame of the game's hit tests, nothing is killed, returns the pairs that hit """
+    enemy_grid.rebuild(game.enemies)
+    bullet_grid.rebuild(game.bullets)
+    player_hits = enemy_grid.spritecollide(game.player, game.enemies, False)
+    bullet_hits = enemy_grid.groupcollide(game.bullets, game.enemies, False, False)
+    boss_hits = bullet_grid.spritecollide(boss, game.bullets, False)
+    return (len(player_hits), sum(len(hits) for hits in bullet_hits.values()), len(boss_hits))
+
+
+def in_game(collision, games):
+    """ Returns ms per tick spent on collisions and the ticks played over games headless games """
+    total = ticks = 0
+    for seed in range(games):
+        # Short enough for the profiler to keep every tick
+        headless.run(FrameProfiler().size, seed, "random", profile=True, collision=collision)
+        for index in game.profiler.recorded():
+            total += game.profiler.times["collide"][index] + game.profiler.times["boss"][index]
+        ticks += game.profiler.frames
+    return total / ticks, ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--games", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8}{'path':>11}{'ms/frame':>10}{'player':>8}{'bullets':>9}{'boss':>6}")
+    for count in args.counts:
+        boss = populate(count)
+        grids = {name: make() for name, make in PATHS.items()}
+        elapsed = dict.fromkeys(PATHS, 0)
+        hits = {name: [0, 0, 0] for name in PATHS}
+        rng = random.Random(args.seed)
+        for _ in range(args.frames):
+            scatter(rng, boss)
+            found = {}
+            for name, (enemy_grid, bullet_grid) in grids.items():
+                begin = time.perf_counter()
+                found[name] = check(enemy_grid, bullet_grid, boss)
+                elapsed[name] += time.perf_counter() - begin
+                hits[name] = [total + new for total, new in zip(hits[name], found[name])]
+            assert found["mask"] == found["occupancy"]
+
+        for name in PATHS:
+            player, bullets, boss_hits = hits[name]
+            print(f"{count:>8}{name:>11}{elapsed[name] * 1000 / args.frames:>10.3f}"
+                  f"{player:>8}{bullets:>9}{boss_hits:>6}")
+
+    print()
+    print(f"{'in game':>11}{'ms/tick':>10}{'ticks':>8}")
+    for name in PATHS:
+        ms, ticks = in_game(name, args.games)
+        print(f"{name:>11}{ms:>10.4f}{ticks:>8}")
+
+
+if __name__ == "__main__":
+    main()
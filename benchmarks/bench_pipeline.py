@@ -0,0 +1,77 @@
+""" Compares the serial game loop with the pipelined one under heavy load
+
+Keeps a fixed number of enemies alive and runs one tick and one drawn frame
+at a time, either one after the other or with the tick on the simulation
+thread while the previous frame is drawn and flipped. Overlap needs a
+second core, with one core the pipelined loop can only break even. Usage:
+
+    python benchmarks/bench_pipeline.py [--counts 100 1000 3000] [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import py_tut_with_images as game
+from controls import PressedKeys
+from pipeline import SimThread
+
+
+def top_up(count):
+    """ Respawns enemies until count are alive and keeps the game going after a death """
+    game.score_screen = False
+    for _ in range(count - len(game.enemies)):
+        game.enemy_pool.acquire()
+
+
+def serial(count, frames):
+    """ Returns frames per second of ticking then drawing """
+    game.init_game(headless=True, seed=0)
+    keys = PressedKeys(0)
+    begin = time.perf_counter()
+    for _ in range(frames):
+        top_up(count)
+        game.run_tick(keys, [])
+        game.draw_world()
+        game.renderer.present()
+    return frames / (time.perf_counter() - begin)
+
+
+def pipelined(count, frames):
+    """ Returns frames per second of ticking on the simulation thread while drawing """
+    game.init_game(headless=True, seed=0)
+    keys = PressedKeys(0)
+    snapshots = (game.FrameSnapshot(), game.FrameSnapshot())
+    sim_thread = SimThread(game.simulate_frame)
+    begin = time.perf_counter()
+    for _ in range(frames):
+        ready = sim_thread.wait()
+        top_up(count)
+        target = snapshots[1] if ready is snapshots[0] else snapshots[0]
+        sim_thread.submit(1, keys, [], 1, False, target)
+        if ready is not None:
+            game.draw_snapshot(ready)
+            game.renderer.present()
+    sim_thread.close()
+    return frames / (time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'enemies':>8}{'serial fps':>12}{'pipelined fps':>15}{'speedup':>9}")
+    for count in args.counts:
+        serial_fps = serial(count, args.frames)
+        pipelined_fps = pipelined(count, args.frames)
+        print(f"{count:>8}{serial_fps:>12.1f}{pipelined_fps:>15.1f}{pipelined_fps / serial_fps:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+""" Measures frame time against the render scale for one window size
+
+Draws a busy scene into the framebuffer at every render scale and scales it
+to the window, with transform.scale and with smoothscale, and compares
+that with drawing at the window's own resolution (render scale = window
+width / logical width). The window is on SDL's dummy driver, so the times
+are drawing and scaling alone. Usage:
+
+    python benchmarks/bench_render_scale.py [--window 1600x1200] [--scales 0.5 0.75 1 1.5 2] [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import py_tut_with_images as game
+from controls import PressedKeys
+
+
+def frame_times(window, scale, smooth, enemies, frames):
+    """ Returns mean ms per frame spent drawing and presenting """
+    game.init_game(headless=True, seed=0, window_size=window, render_scale=scale, smooth_scale=smooth)
+    for _ in range(enemies):
+        game.enemy_pool.acquire()
+    keys = PressedKeys(0)
+
+    draw = present = 0
+    for _ in range(frames):
+        game.run_tick(keys, [])
+        begin = time.perf_counter()
+        game.draw_world()
+        middle = time.perf_counter()
+        game.renderer.present()
+        end = time.perf_counter()
+        draw += middle - begin
+        present += end - middle
+    return draw * 1000 / frames, present * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window", type=game.window_size, default=(1600, 1200))
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.5, 0.75, 1, 1.5, 2])
+    parser.add_argument("--enemies", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    width, height = args.window
+    print(f"window {width}x{height}, {args.enemies} enemies")
+    print(f"{'scale':>6}{'framebuffer':>13}{'filter':>8}{'draw ms':>9}{'present ms':>12}{'frame ms':>10}")
+    for scale in args.scales:
+        framebuffer = f"{round(game.SCREEN_WIDTH * scale)}x{round(game.SCREEN_HEIGHT * scale)}"
+        for smooth in (False, True):
+            draw, present = frame_times(args.window, scale, smooth, args.enemies, args.frames)
+            print(f"{scale:>6}{framebuffer:>13}{'smooth' if smooth else 'nearest':>8}"
+                  f"{draw:>9.2f}{present:>12.2f}{draw + present:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
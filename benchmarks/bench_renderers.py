@@ -0,0 +1,58 @@
+""" Compares sprites per second of the surface and the texture renderer
+
+Draws the same scene of enemies and explosions every frame with each backend,
+at the logical size and in a bigger window that the surface renderer
+scales on the CPU and the texture renderer leaves to SDL. Frames are drawn
+and presented but nothing moves, so only drawing is timed. On SDL's dummy
+video driver the texture renderer is SDL's software one. Usage:
+
+    python benchmarks/bench_renderers.py [--sprites 250 1000 4000] [--windows 800x600 1600x1200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import py_tut_with_images as game
+
+
+def sprites_per_second(backend, window, sprites, frames):
+    """ Returns sprites drawn per second and whether the texture renderer got a GPU driver """
+    game.init_game(headless=True, seed=0, window_size=window, backend=backend)
+    for index in range(sprites):
+        entity = game.explosion_pool.acquire((0, 0), 1) if index % 4 == 0 else game.enemy_pool.acquire()
+        # Spread over the screen instead of waiting off its right edge
+        entity.rect.center = (index * 37 % game.SCREEN_WIDTH, index * 53 % game.SCREEN_HEIGHT)
+    drawn = len(game.all_sprites)
+
+    game.draw_world()
+    game.renderer.present() # Uploads happen here, outside the timing
+    begin = time.perf_counter()
+    for _ in range(frames):
+        game.draw_world()
+        game.renderer.present()
+    elapsed = time.perf_counter() - begin
+    return drawn * frames / elapsed, getattr(game.renderer, "accelerated", None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sprites", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--windows", type=game.window_size, nargs="+", default=[(800, 600), (1600, 1200)])
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'window':>10}{'sprites':>9}{'surface/s':>12}{'texture/s':>12}{'ratio':>7}  texture driver")
+    for window in args.windows:
+        for sprites in args.sprites:
+            surface, _ = sprites_per_second("surface", window, sprites, args.frames)
+            texture, accelerated = sprites_per_second("texture", window, sprites, args.frames)
+            print(f"{'%dx%d' % window:>10}{sprites:>9}{surface:>12,.0f}{texture:>12,.0f}{texture / surface:>6.2f}x  "
+                  f"{'gpu' if accelerated else 'software'}")
+
+
+if __name__ == "__main__":
+    main()
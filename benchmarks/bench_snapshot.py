@@ -0,0 +1,69 @@
+""" Measures world snapshot size and encode, decode and delta times at high entity counts
+
+Fills the world with a fixed number of enemies plus a tenth as many
+bullets, then times capture and encode, decode, restoring the world and
+making and applying the delta of one tick. The pickled world is the size to
+beat. Usage:
+
+    python benchmarks/bench_snapshot.py [--counts 100 1000 5000] [--repeat 20]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.chdir(os.path.join(os.path.dirname(__file__), os.pardir))
+
+import py_tut_with_images as game
+import snapshot
+from controls import PressedKeys
+
+
+def populate(count):
+    """ Starts a game holding count enemies and a tenth as many bullets """
+    game.init_game(headless=True, seed=0)
+    for _ in range(count):
+        game.enemy_pool.acquire()
+    for _ in range(count // 10):
+        game.bullet_pool.acquire((0, game.SCREEN_HEIGHT // 2), 5)
+
+
+def timed(function, repeat):
+    """ Returns the result of the last call and the mean ms per call """
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - begin) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8}{'entities':>9}{'bytes':>9}{'pickle':>9}{'delta':>7}"
+          f"{'encode ms':>11}{'decode ms':>11}{'restore ms':>12}{'delta ms':>10}{'apply ms':>10}")
+    for count in args.counts:
+        populate(count)
+        entities = len(game.all_sprites)
+        data, encode_ms = timed(game.save_snapshot, args.repeat)
+        pickled = len(pickle.dumps(game.capture_world(), pickle.HIGHEST_PROTOCOL))
+        world, decode_ms = timed(lambda: snapshot.decode(data), args.repeat)
+        _, restore_ms = timed(lambda: game.restore_world(world), args.repeat)
+
+        # Only the next tick apart, like consecutive netplay frames
+        game.restore_world(world)
+        game.run_tick(PressedKeys(0), [])
+        following = game.save_snapshot()
+        change, delta_ms = timed(lambda: snapshot.delta(data, following), args.repeat)
+        rebuilt, apply_ms = timed(lambda: snapshot.apply(data, change), args.repeat)
+        assert rebuilt == following
+        print(f"{count:>8}{entities:>9}{len(data):>9}{pickled:>9}{len(change):>7}"
+              f"{encode_ms:>11.2f}{decode_ms:>11.2f}{restore_ms:>12.2f}{delta_ms:>10.2f}{apply_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
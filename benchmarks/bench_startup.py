@@ -0,0 +1,73 @@
+""" Measures time to first frame and time to interactive of a cold start
+
+Every run starts a fresh process and compares loading the loose PNGs one by
+one, decoding them on a thread pool and loading the sprite atlas cache (built
+beforehand). SDL's dummy drivers are used unless --window is given. Usage:
+
+    python benchmarks/bench_startup.py [--threads 0 4] [--runs 10] [--window]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+def child(threads, use_atlas):
+    """ Starts the game once and prints its startup times as JSON """
+    begin = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import py_tut_with_images as game
+    imported = (time.perf_counter() - begin) * 1000
+
+    game.init_game(load_threads=threads, atlas_path=game.atlas.CACHE_PATH if use_atlas else None)
+    times = dict(game.startup_times, imports=imported)
+    game.pygame.quit()
+    print(json.dumps(times))
+
+
+def measure(threads, use_atlas, window):
+    """ Runs a fresh process and returns its startup times """
+    env = dict(os.environ)
+    if not window:
+        env["SDL_VIDEODRIVER"] = "dummy"
+        env["SDL_AUDIODRIVER"] = "dummy"
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", str(threads)] + (["--atlas"] if use_atlas else []),
+        env=env, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0, 4], help="loader threads, 0 is serial")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--window", action="store_true", help="open a real window instead of the dummy driver")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--atlas", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.atlas)
+        return
+
+    # Build the atlas cache up front so no run pays for it
+    measure(0, True, args.window)
+
+    print(f"{'images':>8}{'threads':>9}{'imports ms':>12}{'first frame ms':>16}{'interactive ms':>16}")
+    for threads, use_atlas in [(threads, False) for threads in args.threads] + [(0, True)]:
+        runs = [measure(threads, use_atlas, args.window) for _ in range(args.runs)]
+        imports, first_frame, interactive = (
+            statistics.median(run[key] for run in runs) for key in ("imports", "first_frame", "interactive")
+        )
+        print(f"{'atlas' if use_atlas else 'png':>8}{threads:>9}{imports:>12.1f}{first_frame:>16.1f}{interactive:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import pygame
+
+# Cells a bit larger than most sprites keep each sprite in one to four cells
+CELL_SIZE = 64
+# Testing every pair wins until a check pairs up about this many sprites for
+# each sprite it hashes or looks up. Below it, as in a normal game, building
+# the hash costs more than it saves
+HASH_PAIRS_PER_SPRITE = 32
+# Pixels around the screen an occupancy mask still covers, enough for bullets
+# leaving on the right to hit enemies flying in
+MARGIN = 64
+
+
+class SpatialHash:
+    """ Uniform grid broad phase for one sprite group
+
+    rebuild() takes the group to check against. Once a groupcollide() is big
+    enough to pay for it, see use_for(), its sprites are bucketed by the
+    cells their rects cover, and from then on spritecollide() and
+    groupcollide() only run the usual rect or mask test on sprites sharing a
+    cell. They behave like the pygame.sprite functions of the same name, and
+    simply call them while the hash isn't built or when disabled. collided is
+    the test used when a call doesn't pass one, rects by default.
+    """
+    def __init__(self, cell_size=CELL_SIZE, enabled=True, collided=None, pairs_per_sprite=HASH_PAIRS_PER_SPRITE):
+        self.cell_size = cell_size
+        self.enabled = enabled
+        self.collided = collided
+        self.pairs_per_sprite = pairs_per_sprite
+        self.sprites = ()
+        self.cells = None # None until the hash is built
+
+    def rebuild(self, sprites):
+        """ Starts over with the group to check against, the hash is only built when use_for() asks for it """
+        self.sprites = sprites
+        self.cells = None
+
+    def use_for(self, lookups):
+        """ Returns whether that many lookups go through the hash, building it if they are worth it """
+        if self.cells is not None:
+            return True
+        count = len(self.sprites)
+        if not self.enabled or lookups * count <= self.pairs_per_sprite * (lookups + count):
+            return False
+        self.build()
+        return True
+
+    def build(self):
+        """ Buckets every sprite by the cells its rect overlaps """
+        self.cells = cells = {}
+        size = self.cell_size
+        for sprite in self.sprites:
+            rect = sprite.rect
+            for x in range(rect.left // size, (rect.right - 1) // size + 1):
+                for y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                    bucket = cells.get((x, y))
+                    if bucket is None:
+                        cells[(x, y)] = [sprite]
+                    else:
+                        bucket.append(sprite)
+
+    def candidates(self, rect):
+        """ Returns the sprites sharing a cell with rect, each once and in a stable order
+
+        The result may be a bucket of the hash itself, so do not modify it.
+        """
+        size = self.cell_size
+        left, right = rect.left // size, (rect.right - 1) // size
+        top, bottom = rect.top // size, (rect.bottom - 1) // size
+        # Most sprites sit in a single cell, whose bucket needs no deduplication
+        if left == right and top == bottom:
+            return self.cells.get((left, top), ())
+
+        found = {}
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                bucket = self.cells.get((x, y))
+                if bucket:
+                    for sprite in bucket:
+                        found[sprite] = None
+        return list(found)
+
+    def spritecollide(self, sprite, group, dokill, collided=None):
+        """ Same as pygame.sprite.spritecollide against the group this hash was built from """
+        if collided is None:
+            collided = self.collided
+        # A single lookup never pays for building the hash
+        if self.cells is None:
+            return pygame.sprite.spritecollide(sprite, group, dokill, collided)
+
+        hits = []
+        rect = sprite.rect
+        for other in self.candidates(rect):
+            # Sprites killed since the rebuild are still bucketed, skip them
+            if not group.has_internal(other):
+                continue
+            if collided is None:
+                if not rect.colliderect(other.rect):
+                    continue
+            elif not collided(sprite, other):
+                continue
+            hits.append(other)
+            if dokill:
+                other.kill()
+        return hits
+
+    def groupcollide(self, groupa, groupb, dokilla, dokillb, collided=None):
+        """ Same as pygame.sprite.groupcollide with this hash built from groupb """
+        if collided is None:
+            collided = self.collided
+        if not self.use_for(len(groupa)):
+            return pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb, collided)
+
+        crashed = {}
+        for sprite in groupa.sprites():
+            hits = self.spritecollide(sprite, groupb, dokillb, collided)
+            if hits:
+                crashed[sprite] = hits
+                if dokilla:
+                    sprite.kill()
+        return crashed
+
+
+class OccupancyMask:
+    """ Pixel-perfect collision against a whole group through one frame-sized mask
+
+    rebuild() draws the cached mask of every sprite in a group into a single
+    Mask covering the screen and a margin around it. spritecollide() and
+    groupcollide() then ask it with one overlap() call whether a sprite
+    touches anything in the group at all, and only when it does look for
+    what with collide_mask on the sprites the spatial hash puts nearby, when
+    the hash pays off at all. It is only built on the first such overlap,
+    frames where nothing touches never need it. The results are the same as
+    collide_mask through the hash alone. Every sprite needs a mask
+    attribute, and sprites further off the screen than the margin are left
+    out of the mask.
+    """
+    def __init__(self, size, grid=None, margin=MARGIN):
+        width, height = size
+        self.origin = (-margin, -margin)
+        self.mask = pygame.mask.Mask((width + 2 * margin, height + 2 * margin))
+        self.grid = grid if grid is not None else SpatialHash(collided=pygame.sprite.collide_mask)
+
+    def rebuild(self, sprites):
+        """ Redraws the mask from the sprites' current positions, the hash follows when needed """
+        self.grid.rebuild(sprites)
+        mask = self.mask
+        mask.clear()
+        draw = mask.draw
+        left, top = self.origin
+        for sprite in sprites:
+            rect = sprite.rect
+            draw(sprite.mask, (rect.x - left, rect.y - top))
+
+    def overlaps(self, sprite):
+        """ Returns whether any pixel of sprite's mask is covered, including by sprites killed since the rebuild """
+        left, top = self.origin
+        rect = sprite.rect
+        return self.mask.overlap(sprite.mask, (rect.x - left, rect.y - top)) is not None
+
+    def spritecollide(self, sprite, group, dokill, collided=None):
+        """ Same as pygame.sprite.spritecollide with collide_mask against the group of the rebuild """
+        if not self.overlaps(sprite):
+            return []
+        return self.grid.spritecollide(sprite, group, dokill, collided)
+
+    def groupcollide(self, groupa, groupb, dokilla, dokillb, collided=None):
+        """ Same as pygame.sprite.groupcollide with collide_mask, rebuilt from groupb """
+        crashed = {}
+        sprites = groupa.sprites()
+        checked = False
+        for index, sprite in enumerate(sprites):
+            if not self.overlaps(sprite):
+                continue
+            if not checked:
+                # Only the sprites from the first overlap on can still need a lookup
+                self.grid.use_for(len(sprites) - index)
+                checked = True
+            hits = self.grid.spritecollide(sprite, groupb, dokillb, collided)
+            if hits:
+                crashed[sprite] = hits
+                if dokilla:
+                    sprite.kill()
+        return crashed
@@ -0,0 +1,22 @@
+from pygame.locals import K_UP, K_DOWN, K_LEFT, K_RIGHT, K_SPACE
+
+# One bit per key the player can press
+KEY_BITS = {K_UP: 1, K_DOWN: 2, K_LEFT: 4, K_RIGHT: 8, K_SPACE: 16}
+
+
+class PressedKeys:
+    """ Stands in for pygame.key.get_pressed() using an input bitmask """
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    def __getitem__(self, key):
+        return bool(self.bits & KEY_BITS.get(key, 0))
+
+
+def key_bits(pressed_keys):
+    """ Packs the game keys of pygame.key.get_pressed() into a bitmask """
+    bits = 0
+    for key, bit in KEY_BITS.items():
+        if pressed_keys[key]:
+            bits |= bit
+    return bits
@@ -0,0 +1,107 @@
+try:
+    import numpy
+except ImportError: # NumPy is only needed for the vectorized entity store
+    numpy = None
+
+
+class EntityStore:
+    """ Structure-of-arrays store that moves, bounces and culls one sprite type in bulk
+
+    Positions and velocities live in NumPy arrays, one slot per live sprite.
+    step() updates every slot with a handful of array operations and kills
+    the sprites that left the screen, and sync() copies positions back to the
+    sprite rects once per frame. Lifetimes are left to the game's scheduler.
+
+    Sprites describe their motion with motion(), which returns the horizontal
+    and the vertical velocity. Velocities are per step, like Rect.move_ip() calls.
+    """
+    def __init__(self, size, bounds, cull_left=False, cull_right=False, bounce=False, capacity=256):
+        if numpy is None:
+            raise ImportError("the vectorized entity store needs NumPy")
+        self.width, self.height = size
+        self.bounds = bounds # Screen width and height
+        self.cull_left = cull_left # Kill when past the left edge
+        self.cull_right = cull_right # Kill when past the right edge
+        self.bounce = bounce # Flip vertical velocity at the top and bottom edges
+
+        self.count = 0
+        self.sprites = []
+        self.left = numpy.zeros(capacity, numpy.int64)
+        self.top = numpy.zeros(capacity, numpy.int64)
+        self.vx = numpy.zeros(capacity)
+        self.vy = numpy.zeros(capacity)
+
+    def _grow(self):
+        """ Doubles the capacity of every array """
+        for name in ("left", "top", "vx", "vy"):
+            array = getattr(self, name)
+            grown = numpy.zeros(len(array) * 2, array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, sprite):
+        """ Gives a freshly spawned sprite a slot """
+        if self.count == len(self.left):
+            self._grow()
+        slot = self.count
+        sprite.slot = slot
+        self.sprites.append(sprite)
+        self.left[slot], self.top[slot] = sprite.rect.topleft
+        self.vx[slot], self.vy[slot] = sprite.motion()
+        self.count += 1
+
+    def remove(self, sprite):
+        """ Frees a sprite's slot by moving the last slot into it """
+        slot = sprite.slot
+        last = self.count - 1
+        if slot != last:
+            for array in (self.left, self.top, self.vx, self.vy):
+                array[slot] = array[last]
+            moved = self.sprites[last]
+            moved.slot = slot
+            self.sprites[slot] = moved
+        self.sprites.pop()
+        self.count = last
+
+    def step(self, step):
+        """ Moves every entity and bounces them, then kills the ones that left the screen
+
+        step is the movement multiplier.
+        """
+        count = self.count
+        if not count:
+            return
+        left = self.left[:count]
+        top = self.top[:count]
+        vx = self.vx[:count]
+        vy = self.vy[:count]
+        screen_width, screen_height = self.bounds
+
+        # Rounded like the per-sprite move_ip(round(v * step), ...) calls
+        left += numpy.rint(vx * step).astype(numpy.int64)
+        if self.bounce:
+            top += numpy.rint(vy * step).astype(numpy.int64)
+            vy[top < 0] = 1
+            vy[top + self.height > screen_height] = -1
+
+        dead = numpy.zeros(count, bool)
+        if self.cull_left:
+            dead |= left + self.width < 0
+        if self.cull_right:
+            dead |= left > screen_width
+
+        if dead.any():
+            # Collect first, killing swaps slots around
+            doomed = [self.sprites[index] for index in numpy.flatnonzero(dead).tolist()]
+            for sprite in doomed:
+                sprite.kill()
+
+    def sync(self):
+        """ Copies positions back to the sprite rects, and bounce directions to the sprites """
+        count = self.count
+        positions = zip(self.sprites, self.left[:count].tolist(), self.top[:count].tolist())
+        for sprite, left, top in positions:
+            sprite.rect.topleft = (left, top)
+        if self.bounce:
+            for sprite, direction in zip(self.sprites, self.vy[:count].tolist()):
+                sprite.direction = int(direction)
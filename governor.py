@@ -0,0 +1,58 @@
+from collections import deque
+
+
+class FrameGovernor:
+    """ Sheds load in stages while frames run over budget and restores it once there is headroom
+
+    record() takes how long every frame kept the CPU busy, without the sleep
+    in clock.tick(). When the average of the last window frames is over the
+    budget the level goes up a stage. When it has stayed under headroom times
+    the budget for recover frames in a row it comes down a stage. After every
+    change a full window of new frames is needed before the next decision, so
+    each stage gets to show its effect first. What each level sheds is up to
+    the caller.
+    """
+    def __init__(self, levels, budget_ms=1000 / 60, window=30, headroom=0.6, recover=180, enabled=True):
+        self.levels = levels # Highest level
+        self.budget_ms = budget_ms
+        self.headroom = headroom
+        self.recover = recover
+        self.enabled = enabled
+        self.samples = deque(maxlen=window)
+        self.level = 0
+        self.calm = 0 # Frames in a row with room to spare
+        self.changes = 0
+        self.frames_at = [0] * (levels + 1) # Frames spent on each level
+
+    def record(self, frame_ms):
+        """ Adds a frame time, returns True if the level changed """
+        if not self.enabled:
+            return False
+        self.frames_at[self.level] += 1
+        self.samples.append(frame_ms)
+        if len(self.samples) < self.samples.maxlen:
+            return False
+
+        average = sum(self.samples) / len(self.samples)
+        if average > self.budget_ms:
+            self.calm = 0
+            if self.level < self.levels:
+                return self._change(self.level + 1)
+        elif average < self.budget_ms * self.headroom and self.level > 0:
+            self.calm += 1
+            if self.calm >= self.recover:
+                return self._change(self.level - 1)
+        else:
+            self.calm = 0
+        return False
+
+    def _change(self, level):
+        self.level = level
+        self.samples.clear()
+        self.calm = 0
+        self.changes += 1
+        return True
+
+    def stats(self):
+        """ Returns the current level, how often it changed and the frames spent on each level """
+        return {"level": self.level, "changes": self.changes, "frames_at": list(self.frames_at)}
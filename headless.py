@@ -0,0 +1,140 @@
+""" Runs the game simulation without a window at an uncapped tick rate
+
+Spawns come from a seeded RNG and a simulated clock, so the same seed and
+policy always give the same game. Usage:
+
+    python headless.py --frames 3600 --seed 1 --policy random
+"""
+import argparse
+import random
+import time
+
+import pygame
+from pygame.locals import K_UP, K_DOWN, K_SPACE
+
+import py_tut_with_images as game
+from controls import KEY_BITS, PressedKeys
+
+
+def idle_policy(rng):
+    """ Never presses anything """
+    return lambda frame: 0
+
+
+def sweep_policy(rng):
+    """ Keeps shooting while sweeping up and down the screen """
+    return lambda frame: KEY_BITS[K_SPACE] | (KEY_BITS[K_UP] if frame // 60 % 2 else KEY_BITS[K_DOWN])
+
+
+def random_policy(rng):
+    """ Holds a random key combination for a random number of frames """
+    state = {"bits": 0, "until": 0}
+
+    def policy(frame):
+        if frame >= state["until"]:
+            state["bits"] = rng.getrandbits(len(KEY_BITS))
+            state["until"] = frame + rng.randint(5, 30)
+        return state["bits"]
+    return policy
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "sweep": sweep_policy,
+    "random": random_policy,
+}
+
+
+def run(frames=3600, seed=0, policy="random", render=False, dirty_rects=False, broad_phase=True, vectorized=False, sim_rate=game.SIM_RATE,
+        profile=False, event_log_path=None, event_log_format="jsonl", collision="rect"):
+    """ Plays one headless game until game over or the frame limit and returns its results
+
+    The policy gets its own RNG so input choices never shift the game's spawns.
+    """
+    game.init_game(headless=True, seed=seed, dirty_rects=dirty_rects, broad_phase=broad_phase, vectorized=vectorized,
+                   sim_rate=sim_rate, profile=profile,
+                   event_log_path=event_log_path, event_log_format=event_log_format, collision=collision)
+    next_keys = POLICIES[policy](random.Random(seed))
+
+    # Every frame is exactly one simulation tick
+    frame_ms = 1000 * game.tick_seconds
+    enemy_event = pygame.event.Event(game.ADDENEMY)
+    next_enemy = game.ENEMY_INTERVAL
+
+    frames_run = 0
+    pushed_pixels = 0
+    begin = time.perf_counter()
+    while frames_run < frames:
+        # Timers fire during the tick that reaches them
+        now = game.sim_time + frame_ms
+        events = []
+        if now >= next_enemy:
+            events.append(enemy_event)
+            next_enemy += game.ENEMY_INTERVAL
+
+        game.profiler.begin_frame()
+        game.run_tick(PressedKeys(next_keys(frames_run)), events)
+        if render:
+            game.draw_world()
+            game.profiler.mark("draw")
+            game.renderer.present()
+            game.profiler.mark("present")
+            pushed_pixels += game.renderer.pushed_pixels
+        game.profiler.end_frame(game.group_counts() if profile else None)
+        frames_run += 1
+
+        if game.score_screen:
+            break
+    elapsed = time.perf_counter() - begin
+    game.event_log.close()
+
+    game_over = game.score_screen
+    return {
+        "seed": seed,
+        "policy": policy,
+        "frames": frames_run,
+        "sim_seconds": game.sim_time / 1000,
+        "wall_seconds": elapsed,
+        "fps": frames_run / elapsed if elapsed > 0 else float("inf"),
+        "score": game.final_score if game_over else game.player.score,
+        "game_over": game_over,
+        "won": game.won,
+        "pixels_per_frame": pushed_pixels / frames_run if render and frames_run else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=3600, help="most frames to simulate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--render", action="store_true", help="also draw every frame to the dummy display")
+    parser.add_argument("--dirty", action="store_true", help="render with dirty rectangles")
+    parser.add_argument("--vectorized", action="store_true", help="move sprites with NumPy entity stores")
+    parser.add_argument("--sim-rate", type=int, default=game.SIM_RATE, help="simulation ticks per second")
+    parser.add_argument("--event-log", help="write kills, hits, power-ups and boss events here")
+    parser.add_argument("--event-format", choices=("jsonl", "binary"), default="jsonl")
+    parser.add_argument("--profile-out", help="write per-phase frame times here")
+    parser.add_argument("--profile-format", choices=("json", "csv", "chrome"), default="json")
+    parser.add_argument("--brute", action="store_true", help="test every pair of sprites even when there are enough for the spatial hash")
+    parser.add_argument("--collision", choices=game.COLLISION_MODES, default="rect",
+                        help="hit test by rects, by pixels per sprite or by pixels through one mask per group")
+    args = parser.parse_args()
+
+    result = run(args.frames, args.seed, args.policy, args.render, args.dirty, not args.brute, args.vectorized, args.sim_rate,
+                 args.profile_out is not None, args.event_log, args.event_format, args.collision)
+    print(
+        f"seed {result['seed']} policy {result['policy']}: {result['frames']} frames "
+        f"({result['sim_seconds']:.1f} s simulated) in {result['wall_seconds']:.3f} s, "
+        f"{result['fps']:.0f} FPS, score {result['score']}"
+        + (" (game over)" if result["game_over"] else "")
+    )
+    if args.render:
+        print(f"{result['pixels_per_frame']:.0f} pixels pushed to the display per frame")
+    if args.profile_out:
+        print("\n".join(game.profiler.summary()))
+        game.profiler.dump(args.profile_out, args.profile_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+""" Keeps every finished game's score and the best of them across runs
+
+Scores go to a record file that is only ever appended to, one fixed-size
+RECORD per game behind a short header, and record files from several
+kiosks can be read together for one leaderboard. The best K scores are
+kept in a min-heap in memory, so adding a score costs O(log K) and the
+table for the score screen is sorted from K entries, however many games
+were played. An index file holds those K records and how many bytes of the
+record file they account for. Startup reads it in O(K) and only scans the
+records written after it, which is nothing unless the game stopped between
+two writes. Without a usable index the whole record file is scanned once.
+
+add() only updates the heap and queues the record. A BatchWriter thread
+appends the queued records in batches, fsyncs them and then replaces the
+index, so a game over never waits on the disk and the index never holds
+a score the record file could lose. Usage, for the table of several
+record files:
+
+    python highscores.py highscores.dat kiosk2.dat [--top 10]
+"""
+import argparse
+import heapq
+import os
+import socket
+import struct
+import time
+import zlib
+
+from writer import BatchWriter
+
+MAGIC = b"PYHSR1"
+INDEX_MAGIC = b"PYHSI1"
+KIOSK_BYTES = 16
+# Unix time, score, won, kiosk name
+RECORD = struct.Struct(f"<di?{KIOSK_BYTES}s")
+# Magic, bytes of the record file covered, number of records, checksum of the records
+INDEX_HEADER = struct.Struct("<6sQII")
+# Records read at a time when scanning the record file
+SCAN_RECORDS = 65536
+
+
+def kiosk_name():
+    """ Returns this machine's name as stored in records """
+    return socket.gethostname().encode("utf-8", "replace")[:KIOSK_BYTES]
+
+
+def entry(record):
+    """ Returns the heap entry of a record, the worst score sorts first and the later of two equal ones """
+    stamp, score, won, kiosk = record
+    return (score, -stamp, won, kiosk)
+
+
+def push(heap, size, item):
+    """ Adds a heap entry to a heap of the best size entries, returns whether it made it in """
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+        return True
+    if item > heap[0]:
+        heapq.heapreplace(heap, item)
+        return True
+    return False
+
+
+def scan(path, heap, size, start=0):
+    """ Pushes the records of a record file from byte start on, returns the bytes of whole records
+
+    A missing file or header counts as empty, and a record cut short by a
+    crash is left out.
+    """
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return len(MAGIC)
+    with file:
+        if file.read(len(MAGIC)) != MAGIC:
+            if file.tell() == 0:
+                return len(MAGIC)
+            raise ValueError(f"{path} is not a high score file")
+        end = max(start, len(MAGIC))
+        file.seek(end)
+        while True:
+            data = file.read(RECORD.size * SCAN_RECORDS)
+            whole = len(data) - len(data) % RECORD.size
+            for record in RECORD.iter_unpack(data[:whole]):
+                push(heap, size, entry(record))
+            end += whole
+            if len(data) < RECORD.size * SCAN_RECORDS:
+                return end
+
+
+class HighScores:
+    """ The record file at path, its index at path + ".idx" and the best size scores in memory
+
+    top() reads the in-memory heap, so the table already has a score added
+    a moment ago. The writer thread keeps a heap of its own with only the
+    records it has synced, which is what goes into the index.
+    """
+    def __init__(self, path, size=100, flush_interval=1.0):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.size = size
+        self.flush_interval = flush_interval
+        self.kiosk = kiosk_name()
+        self.added = 0
+        self.written = 0
+        self.syncs = 0
+
+        self.durable, self.covered, indexed = self.load()
+        self.stale = indexed != self.covered # The index needs the records scanned past it
+        self.heap = list(self.durable)
+        self.table = None # Sorted heap, None once a score was added since
+
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        else:
+            # A record cut short goes, so the next one starts where it should
+            self.file.truncate(self.covered)
+        self.writer = BatchWriter(self._write, "highscores", flush_interval,
+                                  self._write_index if self.stale else None)
+
+    def load(self):
+        """ Returns the best scores, the bytes of records they cover and how many bytes the index covered """
+        heap = []
+        start = 0
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read()
+            magic, covered, count, checksum = INDEX_HEADER.unpack_from(data)
+            records = data[INDEX_HEADER.size:INDEX_HEADER.size + count * RECORD.size]
+            # An index for more records than the file holds belongs to some other
+            # file, and one kept for a smaller size may be missing some of the best
+            if (magic == INDEX_MAGIC and len(records) == count * RECORD.size and zlib.crc32(records) == checksum
+                    and len(MAGIC) <= covered <= os.path.getsize(self.path)
+                    and count >= min(self.size, (covered - len(MAGIC)) // RECORD.size)):
+                heap = [entry(record) for record in RECORD.iter_unpack(records)]
+                heapq.heapify(heap)
+                while len(heap) > self.size:
+                    heapq.heappop(heap)
+                start = covered
+        except (FileNotFoundError, struct.error):
+            pass
+        return heap, scan(self.path, heap, self.size, start), start
+
+    def add(self, score, won=False):
+        """ Records a finished game, returns its table entry to pick it out in top() """
+        record = (time.time(), score, won, self.kiosk)
+        self.writer.put(record)
+        self.added += 1
+        item = entry(record)
+        if push(self.heap, self.size, item):
+            self.table = None
+        return item
+
+    def top(self, count):
+        """ Returns the best count entries, best first, as (score, -unix time, won, kiosk) """
+        if self.table is None:
+            self.table = sorted(self.heap, reverse=True)
+        return self.table[:count]
+
+    def flush(self):
+        """ Asks the writer to write and sync what is queued now instead of on its next round """
+        self.writer.flush()
+
+    def _write(self, batch):
+        """ Appends and syncs a batch, then replaces the index with the synced best scores """
+        self.file.write(b"".join(RECORD.pack(*record) for record in batch))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.covered = self.file.tell()
+        self.written += len(batch)
+        self.syncs += 1
+        for record in batch:
+            push(self.durable, self.size, entry(record))
+        # Rewritten even when no record made it in, or startup would scan all of them
+        self._write_index()
+
+    def _write_index(self):
+        """ Replaces the index with the synced best scores, a crash leaves the old one """
+        records = b"".join(RECORD.pack(-stamp, score, won, kiosk) for score, stamp, won, kiosk in self.durable)
+        temporary = self.index_path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, self.covered, len(self.durable), zlib.crc32(records)))
+            file.write(records)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.index_path)
+        self.stale = False
+
+    def close(self):
+        """ Writes whatever is still queued and stops the writer thread """
+        self.writer.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prints the best scores of one or more high score files")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    heap = []
+    for path in args.paths:
+        scan(path, heap, args.top)
+    print(f"{'rank':>4}{'score':>8}  {'date':<17}{'won':<5}kiosk")
+    for rank, (score, stamp, won, kiosk) in enumerate(sorted(heap, reverse=True), 1):
+        date = time.strftime("%Y-%m-%d %H:%M", time.localtime(-stamp))
+        print(f"{rank:>4}{score:>8}  {date:<17}{'yes' if won else '':<5}{kiosk.rstrip(bytes(1)).decode('utf-8', 'replace')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+""" Prototype of networked play over loopback UDP with delta snapshots
+
+The host runs the headless simulation and is the only one that does. Every
+tick the client sends its pressed keys and the tick of the newest snapshot
+it holds. The host answers with the world as a delta against that snapshot,
+or in full when it no longer has it, so lost packets only make the next
+delta bigger. Both ends run in this process, the client on a thread, and
+--loss drops that share of the host's packets on purpose. Snapshots must
+fit in one datagram. Usage:
+
+    python netplay.py --frames 3600 --seed 1 --policy random --loss 0.05
+"""
+import argparse
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import pygame
+
+import py_tut_with_images as game
+import snapshot
+from controls import PressedKeys
+from headless import POLICIES
+
+# Tick the client holds a snapshot of, pressed keys
+INPUT = struct.Struct("<iI")
+# Tick, base tick (-1 for a full snapshot), checksum of the snapshot
+STATE = struct.Struct("<iiI")
+MAX_DATAGRAM = 65507
+HISTORY = 64 # Snapshots each end keeps to make and apply deltas
+TIMEOUT = 1 # Seconds the host waits for input before it gives up
+LOSS_WAIT = 0.05 # Seconds the client waits for a snapshot before it takes it as lost
+
+
+class Client:
+    """ Sends input and rebuilds the host's world from what comes back """
+    def __init__(self, host_address, policy, frames):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(LOSS_WAIT)
+        self.host_address = host_address
+        self.policy = policy
+        self.frames = frames
+        self.snapshots = {} # tick: snapshot
+        self.newest = -1
+        self.received = 0
+        self.mismatches = 0 # Snapshots that didn't rebuild to what the host had
+        self.entities = 0 # Entities in the newest snapshot
+
+    def run(self):
+        for frame in range(self.frames):
+            self.socket.sendto(INPUT.pack(self.newest, self.policy(frame)), self.host_address)
+            try:
+                packet = self.socket.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            self.receive(packet)
+        self.socket.close()
+
+    def receive(self, packet):
+        tick, base, checksum = STATE.unpack_from(packet)
+        body = packet[STATE.size:]
+        if base < 0:
+            data = body
+        elif base in self.snapshots:
+            data = snapshot.apply(self.snapshots[base], body)
+        else:
+            return
+        self.received += 1
+        if zlib.crc32(data) != checksum:
+            self.mismatches += 1
+            return
+        self.snapshots[tick] = data
+        self.snapshots.pop(tick - HISTORY, None)
+        self.newest = tick
+        self.entities = sum(len(records) for name, records in snapshot.decode(data).items()
+                            if name in snapshot.RECORDS)
+
+
+def host(frames, seed, policy, loss):
+    """ Runs the game for a client on a thread and returns what went over the wire """
+    game.init_game(headless=True, seed=seed)
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(TIMEOUT)
+    client = Client(server.getsockname(), POLICIES[policy](random.Random(seed)), frames)
+    thread = threading.Thread(target=client.run, name="client", daemon=True)
+    thread.start()
+
+    drop = random.Random(seed)
+    frame_ms = 1000 * game.tick_seconds
+    enemy_event = pygame.event.Event(game.ADDENEMY)
+    next_enemy = game.ENEMY_INTERVAL
+    history = {} # tick: snapshot
+    stats = {"frames": 0, "full": 0, "deltas": 0, "full_bytes": 0, "delta_bytes": 0, "dropped": 0}
+
+    begin = time.perf_counter()
+    while stats["frames"] < frames:
+        try:
+            packet, address = server.recvfrom(INPUT.size)
+        except socket.timeout:
+            break
+        acked, bits = INPUT.unpack(packet)
+
+        now = game.sim_time + frame_ms
+        events = []
+        if now >= next_enemy:
+            events.append(enemy_event)
+            next_enemy += game.ENEMY_INTERVAL
+        game.run_tick(PressedKeys(bits), events)
+        # The client only watches, a game over starts the next game at once
+        game.score_screen = False
+        stats["frames"] += 1
+
+        data = game.save_snapshot()
+        tick = game.tick_count
+        history[tick] = data
+        history.pop(tick - HISTORY, None)
+        if acked in history:
+            body = snapshot.delta(history[acked], data)
+            base = acked
+            stats["deltas"] += 1
+            stats["delta_bytes"] += len(body) + STATE.size
+        else:
+            body = data
+            base = -1
+            stats["full"] += 1
+            stats["full_bytes"] += len(body) + STATE.size
+        if len(body) + STATE.size > MAX_DATAGRAM:
+            raise ValueError(f"a {len(body)} byte snapshot doesn't fit in a datagram")
+        if drop.random() < loss:
+            stats["dropped"] += 1
+            continue
+        server.sendto(STATE.pack(tick, base, zlib.crc32(data)) + body, address)
+
+    elapsed = time.perf_counter() - begin
+    server.close()
+    thread.join()
+    stats.update({
+        "wall_seconds": elapsed,
+        "received": client.received,
+        "mismatches": client.mismatches,
+        "entities": client.entities,
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--loss", type=float, default=0, help="share of the host's packets to drop")
+    args = parser.parse_args()
+
+    stats = host(args.frames, args.seed, args.policy, args.loss)
+    sent = stats["full_bytes"] + stats["delta_bytes"]
+    seconds = stats["frames"] * game.tick_seconds
+    print(f"{stats['frames']} ticks in {stats['wall_seconds']:.2f} s, "
+          f"{stats['received']} snapshots received, {stats['dropped']} dropped, {stats['mismatches']} mismatched")
+    print(f"full snapshots: {stats['full']}, {stats['full_bytes'] / max(1, stats['full']):.0f} bytes on average")
+    print(f"deltas: {stats['deltas']}, {stats['delta_bytes'] / max(1, stats['deltas']):.0f} bytes on average")
+    print(f"{sent / seconds / 1024:.1f} KB per simulated second, {stats['entities']} entities at the end")
+
+
+if __name__ == "__main__":
+    main()
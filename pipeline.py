@@ -0,0 +1,54 @@
+import queue
+import threading
+
+
+class SimThread:
+    """ Runs one simulation job at a time on a worker thread
+
+    submit() hands a job to the worker and returns at once, wait() blocks
+    until it is done and returns its result, or raises what it raised. The
+    caller must not touch the game state between the two, everything else,
+    like drawing the previous frame, can run in the meantime.
+    """
+    def __init__(self, function):
+        self.function = function
+        self.jobs = queue.Queue(maxsize=1)
+        self.results = queue.Queue(maxsize=1)
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def submit(self, *args):
+        """ Starts function(*args) on the worker, the previous job must have been waited for """
+        if self.busy:
+            raise RuntimeError("the previous simulation job is still running")
+        self.busy = True
+        self.jobs.put(args)
+
+    def wait(self):
+        """ Returns the result of the running job, None if there is none """
+        if not self.busy:
+            return None
+        self.busy = False
+        ok, value = self.results.get()
+        if not ok:
+            raise value
+        return value
+
+    def _run(self):
+        while True:
+            args = self.jobs.get()
+            if args is None:
+                return
+            try:
+                self.results.put((True, self.function(*args)))
+            except BaseException as error:
+                self.results.put((False, error))
+
+    def close(self):
+        """ Waits for the running job and stops the worker """
+        try:
+            self.wait()
+        finally:
+            self.jobs.put(None)
+            self.thread.join()
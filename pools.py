@@ -0,0 +1,83 @@
+import pygame
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    """ Sprite that hands itself back to its pool when killed
+
+    Subclasses set up shared data in __init__ and per-use state in spawn(),
+    which is called again every time the pool recycles the instance.
+    """
+    pool = None
+    generation = 0 # Goes up every time the pool hands the instance out again
+
+    def spawn(self, *args):
+        """ (Re)initialises per-use state, overridden by subclasses """
+
+    def kill(self):
+        was_alive = self.alive()
+        super(PooledSprite, self).kill()
+        # Only release once, kill() may be called on an already dead sprite
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+
+class SpritePool:
+    """ Recycles killed sprites of one class and re-adds them to their groups """
+    def __init__(self, sprite_class, groups, cap=256, store=None):
+        self.sprite_class = sprite_class
+        self.groups = groups # The first group is the one owned by this sprite type
+        self.cap = cap # Most idle sprites kept around, extra ones are left to the GC
+        self.store = store # Optional EntityStore that moves live sprites in bulk
+        self.free = []
+
+        self.hits = 0 # Sprites reused from the pool
+        self.misses = 0 # Sprites that had to be allocated
+        self.dropped = 0 # Released sprites not kept because the pool was full
+        self.in_use = 0
+        self.high_water = 0 # Most sprites alive at once
+
+    def acquire(self, *args):
+        """ Returns a live sprite spawned with args, reusing an idle one if possible """
+        if self.free:
+            sprite = self.free.pop()
+            sprite.generation += 1
+            sprite.spawn(*args)
+            self.hits += 1
+        else:
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.misses += 1
+
+        sprite.add(*self.groups)
+        if self.store is not None:
+            self.store.add(sprite)
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def release(self, sprite):
+        """ Takes back a killed sprite """
+        if self.store is not None:
+            self.store.remove(sprite)
+        self.in_use -= 1
+        if len(self.free) < self.cap:
+            self.free.append(sprite)
+        else:
+            self.dropped += 1
+
+    def reclaim(self):
+        """ Kills every live sprite so it returns to the pool, used on game reset """
+        for sprite in self.groups[0].sprites():
+            sprite.kill()
+
+    def stats(self):
+        """ Returns the pool counters """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "dropped": self.dropped,
+            "in_use": self.in_use,
+            "free": len(self.free),
+            "high_water": self.high_water,
+        }
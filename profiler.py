@@ -0,0 +1,160 @@
+import csv
+import json
+import time
+from array import array
+
+import pygame
+
+# Phases of a frame, in the order they run
+PHASES = ("events", "update", "collide", "boss", "draw", "present")
+
+
+class FrameProfiler:
+    """ Times each phase of the main loop into a ring buffer of recent frames
+
+    Call begin_frame() at the top of a frame, mark(phase) at the end of every
+    phase and end_frame() once the frame is done. mark() charges the time since
+    the previous mark to the phase, so phases that run several times a frame
+    (one per simulation tick) add up. When disabled every call returns at once.
+    """
+    def __init__(self, size=600, enabled=True):
+        self.size = size # Frames kept in the ring buffer
+        self.enabled = enabled
+        self.times = {phase: array("d", bytes(8 * size)) for phase in PHASES} # ms per phase
+        self.totals = array("d", bytes(8 * size)) # ms per frame
+        self.starts = array("d", bytes(8 * size)) # Frame start, seconds since the profiler was made
+        self.counts = [None] * size # Entity counts per group
+        self.index = 0 # Slot of the frame being recorded
+        self.frames = 0 # Frames recorded so far
+        self.origin = time.perf_counter()
+        self.frame_start = self.last_mark = self.origin
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        for phase in PHASES:
+            self.times[phase][self.index] = 0
+
+    def mark(self, phase):
+        """ Charges the time since the last mark to phase """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.times[phase][self.index] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self, counts=None):
+        """ Closes the frame, counts maps group names to how many sprites they hold """
+        if not self.enabled:
+            return
+        index = self.index
+        self.totals[index] = (time.perf_counter() - self.frame_start) * 1000
+        self.starts[index] = self.frame_start - self.origin
+        self.counts[index] = counts
+        self.index = (index + 1) % self.size
+        self.frames += 1
+
+    def recorded(self):
+        """ Returns the ring buffer slots in the order they were recorded """
+        if self.frames < self.size:
+            return list(range(self.frames))
+        return list(range(self.index, self.size)) + list(range(self.index))
+
+    def percentiles(self, phase=None, quantiles=(0.5, 0.95, 0.99)):
+        """ Returns rolling percentiles in ms for a phase, or whole frames if phase is None """
+        values = self.totals if phase is None else self.times[phase]
+        ordered = sorted(values[index] for index in self.recorded())
+        if not ordered:
+            return tuple(0 for _ in quantiles)
+        return tuple(ordered[int(q * (len(ordered) - 1))] for q in quantiles)
+
+    def summary(self):
+        """ Returns lines of p50/p95/p99 per phase """
+        lines = [f"{'phase':<9}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase in PHASES + (None,):
+            p50, p95, p99 = self.percentiles(phase)
+            lines.append(f"{phase or 'frame':<9}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+        return lines
+
+    def rows(self):
+        """ Yields one dict per recorded frame, oldest first """
+        first = self.frames - len(self.recorded())
+        for number, index in enumerate(self.recorded(), first):
+            row = {"frame": number, "start": self.starts[index], "total": self.totals[index]}
+            row.update((phase, self.times[phase][index]) for phase in PHASES)
+            row["counts"] = self.counts[index] or {}
+            yield row
+
+    def dump_json(self, path):
+        with open(path, "w") as file:
+            json.dump({"phases": PHASES, "frames": list(self.rows())}, file)
+
+    def dump_csv(self, path):
+        rows = list(self.rows())
+        groups = sorted({name for row in rows for name in row["counts"]})
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "start", "total", *PHASES, *(f"count_{name}" for name in groups)])
+            for row in rows:
+                writer.writerow(
+                    [row["frame"], f"{row['start']:.6f}", f"{row['total']:.4f}"]
+                    + [f"{row[phase]:.4f}" for phase in PHASES]
+                    + [row["counts"].get(name, 0) for name in groups]
+                )
+
+    def dump_chrome_trace(self, path):
+        """ Writes a trace for chrome://tracing or Perfetto
+
+        Phases that ran several times in a frame are merged and laid out back
+        to back in PHASES order, so durations are exact but offsets are not.
+        """
+        events = []
+        for row in self.rows():
+            start = row["start"] * 1e6 # Microseconds
+            events.append({"name": "frame", "ph": "X", "ts": start, "dur": row["total"] * 1000,
+                           "pid": 0, "tid": 0, "args": row["counts"]})
+            for phase in PHASES:
+                duration = row[phase] * 1000
+                events.append({"name": phase, "ph": "X", "ts": start, "dur": duration, "pid": 0, "tid": 0})
+                start += duration
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def dump(self, path, format="json"):
+        """ Writes the ring buffer as json, csv or chrome trace """
+        {"json": self.dump_json, "csv": self.dump_csv, "chrome": self.dump_chrome_trace}[format](path)
+
+
+class ProfilerOverlay:
+    """ Toggleable on-screen table of rolling frame times and group sizes """
+    def __init__(self, profiler, refresh=30):
+        self.profiler = profiler
+        self.refresh = refresh # Frames between re-rendering the text
+        self.visible = False
+        self.font = None
+        self.surf = None
+        self.age = refresh
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.age = self.refresh
+
+    def draw(self, renderer, counts):
+        """ Blits the overlay in the top left corner, re-rendering it every refresh frames """
+        if not self.visible:
+            return
+        self.age += 1
+        if self.age >= self.refresh:
+            self.age = 0
+            if self.font is None:
+                self.font = pygame.font.SysFont("monospace", 14)
+            lines = self.profiler.summary()
+            lines.append(" ".join(f"{name}:{count}" for name, count in counts.items()))
+            rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+            height = self.font.get_linesize()
+            self.surf = pygame.Surface((max(line.get_width() for line in rendered) + 8, height * len(lines) + 8))
+            self.surf.set_alpha(200)
+            for row, line in enumerate(rendered):
+                self.surf.blit(line, (4, 4 + row * height))
+        renderer.blit(self.surf, (0, 0))
@@ -4,52 +4,169 @@ import pygame
 # Import random for random numbers
 import random
 
+# Import os to select SDL drivers for headless runs
+import os
+
+import argparse
+import struct
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 # Import pygame.locals for easier access to key coordinates
 # Updated to conform to flake8 and black standards
 # from pygame.locals import *
 from pygame.locals import (
-    RLEACCEL,
     K_UP,
     K_DOWN,
     K_LEFT,
     K_RIGHT,
     K_ESCAPE,
+    K_F3,
+    K_F5,
+    K_F6,
+    K_F9,
+    K_p,
     KEYDOWN,
     QUIT,
     K_SPACE
 )
 #from pygame.music import play
 
+import atlas
+from assets import AssetRegistry
+from pools import PooledSprite, SpritePool
+from rendering import DirtyRenderer, FullRenderer, ScaledRenderer, TextureRenderer
+from collision import OccupancyMask, SpatialHash
+from background import ParallaxBackground
+from entities import EntityStore
+from timestep import FixedTimestep
+from profiler import FrameProfiler, ProfilerOverlay
+from text import TextCache
+from sound import SoundManager
+from telemetry import EventLog
+from scheduler import Scheduler
+from governor import FrameGovernor
+from highscores import HighScores
+from pipeline import SimThread
+import snapshot
+
 # Define constants for the screen width and height
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 
+# Sky blue background
+SKY_COLOR = (135, 206, 250)
+# A different color here gives the sky a gradient from it down to SKY_COLOR,
+# which costs an opaque blit per frame instead of a fill
+SKY_TOP_COLOR = SKY_COLOR
+
+# Sound effects
+# name: (file, volume, priority, shortest time between two plays in seconds)
+# Sound sources: Jon Fincher
+SOUNDS = {
+    "move_up": ("Rising_putter.ogg", 0.5, 0, 0.25),
+    "move_down": ("Falling_putter.ogg", 0.5, 0, 0.25),
+    "collision": ("Collision.ogg", 0.5, 2, 0.05),
+}
+SOUND_CHANNELS = 8
+# Threads decoding images and sounds at startup, one per spare core as they
+# only slow the window down when sharing its core. 0 loads them one by one
+LOAD_THREADS = min(4, (os.cpu_count() or 1) - 1)
+
+# How hits are found: "rect" tests rects, "mask" tests pixels sprite by
+# sprite and "occupancy" draws each group into one frame-sized mask first
+COLLISION_MODES = ("rect", "mask", "occupancy")
+# Events that close the game, WINDOWCLOSE is only there from pygame 2.0.1 on
+QUIT_EVENTS = tuple(event for event in (QUIT, getattr(pygame, "WINDOWCLOSE", None)) if event is not None)
+# Where every game's score is kept, the best TOP_SCORES stay in memory and
+# the score screen lists SCORE_TABLE of them
+SCORES_PATH = "highscores.dat"
+TOP_SCORES = 100
+SCORE_TABLE = 5
+
+# Power-up kinds as logged by the event log
+POWER_CODES = {"HP": 0, "DMG": 1}
+
+# Live score and health display
+HUD_COLOR = (255, 255, 255)
+HUD_SIZE = 28
+PAUSE_SIZE = 64
+
+# Gameplay tuning, see batch.py for trying out other values
+BOSS_HEALTH = 50
+BOSS_SCORE = 200 # Score at which the boss appears
+GUNNER_CAP = 6 # Most gunners at once
+GUNNER_INTERVAL = 5000 # ms between gunners
+POWERUP_ROLL = 9 # A power-up drops when a 1-10 roll is at least this
+
+# Images, sounds and the background are loaded by the first init_game() and
+# shared by every game after it in the same process
+asset_registry = None
+sounds = None
+background = None
+
+# Milliseconds from the start of init_game() to the first frame on screen and
+# to the game being ready for input
+startup_times = {}
+
 # Define framerate 
-# Higher values may cause issues with movement
+# This is the render rate, the simulation runs at its own fixed SIM_RATE
 FRAMERATE = 60
 
+# Load shedding stages of the frame governor, each level also sheds the ones below it
+SHED_CLOUDS = 1 # Only the farthest clouds are drawn
+SHED_EXPLOSIONS = 2 # Explosions last EXPLOSION_SHED_SCALE as long
+SHED_SPAWNS = 3 # No new enemies while SHED_ENEMY_CAP are alive
+SHED_RENDER = 4 # No interpolation and explosions aren't drawn
+EXPLOSION_SHED_SCALE = 0.5
+SHED_ENEMY_CAP = 12
+
+# F5 writes the world here and F9 reads it back
+QUICKSAVE_PATH = "quicksave.snap"
+
+# Simulation ticks per second, every timer and movement advances per tick
+SIM_RATE = 60
+
+# Custom event for adding a new enemy, and how often it fires (ms)
+ADDENEMY = pygame.USEREVENT + 1
+ENEMY_INTERVAL = 250
+
+# Most idle sprites each pool keeps for reuse
+POOL_CAPS = {
+    "bullets": 64,
+    "enemies": 128,
+    "explosions": 64,
+    "boss_attack": 16,
+}
+
 # Define the Player object extending pygame.sprite.Sprite
 # Instead of a surface, we use an image for a better looking sprite
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super(Player, self).__init__()
-        self.surf = pygame.image.load("jet.png").convert()
-        self.surf.set_colorkey((255, 255, 255), RLEACCEL)
+        self.surf = asset_registry.image("jet")
+        self.mask = asset_registry.mask("jet")
         self.rect = self.surf.get_rect()
 
         self.health = 5
-        self.cooldown = 1
-        self.bullet_timer = self.cooldown # Shooting cooldown (in seconds)
+        self.cooldown = 1 # Shooting cooldown (in seconds)
+        self.loaded = False
+        self.reload_timer = timers.after(self.cooldown, self.reload)
         self.score = 0
 
 
     def shoot(self, position, velocity):
         """ Makes plane shoot missile """
-        if self.bullet_timer <= 0: # Shoots if not on cooldown      
-            self.bullet_timer = self.cooldown # Resets cooldown 
-            bullet = Bullet(position, velocity)
-            bullets.add(bullet)
-            all_sprites.add(bullet)
+        if self.loaded: # Shoots if not on cooldown
+            self.loaded = False
+            self.reload_timer = timers.after(self.cooldown, self.reload)
+            bullet_pool.acquire(position, velocity)
+
+    def reload(self):
+        """ Ends the shooting cooldown, also used to skip it """
+        timers.cancel(self.reload_timer)
+        self.loaded = True
 
 
     # Move the sprite based on keypresses
@@ -59,10 +176,10 @@ class Player(pygame.sprite.Sprite):
     def update(self, pressed_keys):
         if pressed_keys[K_UP]:
             self.rect.move_ip(0, round(-6 * step))
-            move_up_sound.play()
+            sounds.play("move_up")
         if pressed_keys[K_DOWN]:
             self.rect.move_ip(0, round(6 * step))
-            move_down_sound.play()
+            sounds.play("move_down")
         if pressed_keys[K_LEFT]:
             self.rect.move_ip(round(-6 * step), 0)
         if pressed_keys[K_RIGHT]:
@@ -82,27 +199,30 @@ class Player(pygame.sprite.Sprite):
         if pressed_keys[K_SPACE]:
             self.shoot(self.rect.midright, 5)
 
-        # Reduces shooting cooldown by (1 / framerate) per frame, if on cooldown
-        self.bullet_timer -= 1/FRAMERATE if self.bullet_timer > 0 else self.bullet_timer
-
 
 # Define the enemy object extending pygame.sprite.Sprite
 # Instead of a surface, we use an image for a better looking sprite
-class Enemy(pygame.sprite.Sprite):
+class Enemy(PooledSprite):
     def __init__(self):
         super(Enemy, self).__init__()
-        self.surf = pygame.image.load("paper_plane.png").convert_alpha()
-        self.surf.set_colorkey((255, 255, 255), RLEACCEL)
+        self.surf = asset_registry.image("paper_plane")
+        self.mask = asset_registry.mask("paper_plane")
+        self.rect = self.surf.get_rect()
+        self.spawn()
+
+    def spawn(self):
         # The starting position is randomly generated, as is the speed
-        self.rect = self.surf.get_rect(
-            center=(
-                random.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
-                random.randint(0, SCREEN_HEIGHT),
-            )
+        self.rect.center = (
+            random.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
+            random.randint(0, SCREEN_HEIGHT),
         )
         self.speed = random.randint(5, 15)
         self.direction = random.choice([1, -1]) # 1 = up, -1 = down
 
+    def motion(self):
+        """ Velocities for the entity store """
+        return -self.speed, self.direction
+
     # Move the enemy based on speed
     # Change up/down direction when it reaches edge of screen
     # Remove it when it passes the left edge of the screen
@@ -116,39 +236,23 @@ class Enemy(pygame.sprite.Sprite):
             self.kill()
 
 
-# Define the cloud object extending pygame.sprite.Sprite
-# Use an image for a better looking sprite
-class Cloud(pygame.sprite.Sprite):
-    def __init__(self):
-        super(Cloud, self).__init__()
-        self.surf = pygame.image.load("cloud.png").convert()
-        self.surf.set_colorkey((0, 0, 0), RLEACCEL)
-        # The starting position is randomly generated
-        self.rect = self.surf.get_rect(
-            center=(
-                random.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
-                random.randint(0, SCREEN_HEIGHT),
-            )
-        )
-
-    # Move the cloud based on a constant speed
-    # Remove it when it passes the left edge of the screen
-    def update(self):
-        self.rect.move_ip(round(-5 * step), 0)
-        if self.rect.right < 0:
-            self.kill()
-
-
-class Bullet(pygame.sprite.Sprite):
-    """ Extends pygame.sprite.Sprite class and handles aspects specific to player bullets """
+class Bullet(PooledSprite):
+    """ Extends PooledSprite class and handles aspects specific to player bullets """
     def __init__(self, position, velocity):
         super(Bullet, self).__init__()
-        self.surf = pygame.image.load("player_missile.png").convert()
-        self.surf.set_colorkey((0, 0, 0), RLEACCEL)
-        self.mask = pygame.mask.from_surface(self.surf)
+        self.surf = asset_registry.image("player_missile")
+        self.mask = asset_registry.mask("player_missile")
+        self.rect = self.surf.get_rect()
+        self.spawn(position, velocity)
+
+    def spawn(self, position, velocity):
         self.velocity = velocity
         # Position is dependent on where plane was when shot
-        self.rect = self.surf.get_rect(center=(position))
+        self.rect.center = position
+
+    def motion(self):
+        """ Velocities for the entity store """
+        return self.velocity, 0
 
     def update(self):
         """ Update bullet speed """
@@ -158,29 +262,28 @@ class Bullet(pygame.sprite.Sprite):
             self.kill()
 
 
-class Explosion(pygame.sprite.Sprite):
-    """ Extends pygame.sprite.Sprite class and handles aspects specific to explosions """
+class Explosion(PooledSprite):
+    """ Extends PooledSprite class and handles aspects specific to explosions """
     def __init__(self, position, lifetime):
         super(Explosion, self).__init__()
-        self.surf = pygame.image.load("explosion.png").convert()
-        self.surf.set_colorkey((0, 0, 0), RLEACCEL)
-        self.rect = self.surf.get_rect(center=(position))
-        self.lifetime = lifetime # How long the explosions will stay (in seconds)
+        self.surf = asset_registry.image("explosion")
+        self.rect = self.surf.get_rect()
+        self.spawn(position, lifetime)
 
-    def update(self):
-        """ Update explosion timer """
-        self.lifetime -= 1/FRAMERATE if self.lifetime > 0 else self.lifetime
-
-        if self.lifetime <= 0: # When lifetime runs out, remove explosion
-            self.kill()
+    def spawn(self, position, lifetime):
+        self.rect.center = position
+        # Removed when its lifetime (in seconds) runs out
+        if governor.level >= SHED_EXPLOSIONS:
+            lifetime *= EXPLOSION_SHED_SCALE
+        self.expiry = timers.after(lifetime, self.kill, name="Explosion.kill")
 
 #This enemy is much faster than the player and can fire but can only move up and down
 class Gunner(pygame.sprite.Sprite):
     """ Extends pygame.sprite.Sprite class and handles aspects specific to Gunner """
     def __init__(self, x, gunner_move_up):
         super(Gunner, self).__init__()
-        self.surf = pygame.image.load("spitfire_gunner.png").convert()
-        self.surf.set_colorkey((255, 255, 255), RLEACCEL)
+        self.surf = asset_registry.image("spitfire_gunner")
+        self.mask = asset_registry.mask("spitfire_gunner")
         self.rect = self.surf.get_rect(
             center=(
                 x,
@@ -209,12 +312,13 @@ class Boss(pygame.sprite.Sprite):
     """ Extends pygame.sprite.Sprite class and handles aspects specific to Boss """
     def __init__(self, x, y, boss_move_up, health):
         super(Boss, self).__init__()
-        self.surf = pygame.image.load("boss.png").convert_alpha()
+        self.surf = asset_registry.image("boss")
         self.rect = self.surf.get_rect(center=(x, y)) # x and y set when boss is created
-        self.mask = pygame.mask.from_surface(self.surf)
+        self.mask = asset_registry.mask("boss")
         self.move_up = boss_move_up # If boss should move up or not
         self.health = health
         self.cooldown = 3 # Decides how long between boss attacks
+        self.attack_timer = timers.after(self.cooldown, self.attack)
     
     def update(self):
         # If boss should move up or not is changed when certian values are reached
@@ -231,23 +335,28 @@ class Boss(pygame.sprite.Sprite):
             self.rect.move_ip(0,round(-2 * step))
         else:
             self.rect.move_ip(0,round(2 * step))
-        # When cooldown is 0 spawns a attack from attack class on players y value 
-        if self.cooldown <= 0:
-            attack= Attack(800, player.rect.top, -15)
-            boss_attack.add(attack)
-            all_sprites.add(attack)
-            self.cooldown = 3 # Resets the cooldown
-        
-        self.cooldown -= 1/FRAMERATE if self.cooldown > 0 else self.cooldown
 
+    def attack(self):
+        """ Spawns an attack on the player's y value and waits for the next one """
+        attack_pool.acquire(800, player.rect.top, -15)
+        self.attack_timer = timers.after(self.cooldown, self.attack)
 
-class Attack(pygame.sprite.Sprite):
+
+class Attack(PooledSprite):
     def __init__(self, position_x, position_y, velocity):
         super(Attack, self).__init__()
-        self.surf = pygame.image.load("boss_attack1.png").convert()
-        self.surf.set_colorkey((255,255,255), RLEACCEL)
-        self.rect = self.surf.get_rect(center=(position_x, position_y)) # Position is decided when spawning 
+        self.surf = asset_registry.image("boss_attack1")
+        self.mask = asset_registry.mask("boss_attack1")
+        self.rect = self.surf.get_rect()
+        self.spawn(position_x, position_y, velocity)
+
+    def spawn(self, position_x, position_y, velocity):
+        self.rect.center = (position_x, position_y) # Position is decided when spawning 
         self.velocity = velocity
+
+    def motion(self):
+        """ Velocities for the entity store """
+        return self.velocity, 0
     
     def update(self):
        self.rect.move_ip(round(self.velocity * step), 0) # Moves object towards left side of screeen
@@ -261,54 +370,79 @@ class PowerUp(pygame.sprite.Sprite):
         self.power = power
 
         if self.power == "HP":
-            self.surf = pygame.image.load("health.png").convert()
+            self.surf = asset_registry.image("health")
         elif self.power == "DMG":
-            self.surf = pygame.image.load("ammo.png").convert()
+            self.surf = asset_registry.image("ammo")
 
-        self.surf.set_colorkey((0, 0, 0), RLEACCEL)
         self.rect = self.surf.get_rect(center=(position))
         self.activated = False
-        self.timer = 10
-        self.lifetime = 3
+        # Removed after its lifetime (in seconds) unless it is powering up the player
+        self.expiry = timers.after(3, self.kill, name="PowerUp.kill")
 
     def activate(self):
         if self.power == "HP":
             player.health += 1
         elif self.power == "DMG":
-            print("yo")
+            # Faster shooting for 4 seconds, then the power-up is gone
             self.activated = True
-            self.timer = 4
-            player.bullet_timer = 0
+            timers.cancel(self.expiry)
+            self.expiry = timers.after(4, self.deactivate)
+            player.reload()
             player.cooldown = 0.3
 
     def deactivate(self):
         player.cooldown = 1
         self.activated = False
+        self.kill()
+                                    
 
-    def update(self):
-        self.lifetime -= 1/FRAMERATE if self.lifetime > 0 else self.lifetime
-        self.timer -= 1/FRAMERATE if self.timer > 0 else self.timer
+class FrameSnapshot:
+    """ Everything one frame draws, so it can be drawn while the next frame is simulated
 
-        if self.timer <= 0:
-            self.deactivate()
+    capture() copies surfaces and positions out of the game state on the
+    simulation thread and draw_snapshot() blits them on the main thread.
+    """
+    def __init__(self):
+        self.sprites = [] # (surface, topleft a tick earlier, topleft)
+        self.alpha = 1
+        self.seconds = 0 # Simulated time the frame shows, for the background
+        self.score = 0
+        self.health = 0
+        self.boss_health = None # None when there is no boss
+
+    def capture(self, alpha, previous, reduced):
+        """ Takes the current state, previous is from sprite_positions() and reduced leaves out explosions """
+        sprites = self.sprites
+        sprites.clear()
+        self.seconds = frame_seconds(alpha, previous)
+        previous = previous or {}
+        for entity in all_sprites:
+            if reduced and explosions.has_internal(entity):
+                continue
+            topleft = entity.rect.topleft
+            sprites.append((entity.surf, previous.get(spawn_key(entity), topleft), topleft))
+        self.alpha = alpha
+        self.score = player.score
+        self.health = player.health
+        self.boss_health = the_boss.health if boss_exists else None
 
-        if self.lifetime <= 0 and not self.activated: # When lifetime runs out, remove explosion
-            self.kill()
-                                    
 
 def reset():
     """ Resets game data and returns new player object """
-    # Print blank line to separate score displays
-    print()
+    # Hand pooled sprites back before the groups are emptied
+    for pool in pools:
+        pool.reclaim()
+    # Nothing that was waiting on a timer is left
+    timers.clear()
 
     # Empty sprite groups
     enemies.empty()
-    clouds.empty()
     bullets.empty()
     explosions.empty()
     boss.empty()
     boss_attack.empty()
     gunner.empty()
+    powerups.empty()
     all_sprites.empty()
 
     # Reset player data
@@ -317,191 +451,559 @@ def reset():
 
     return player
 
-# Setup for sounds, defaults are good
-pygame.mixer.init()
+def capture_world():
+    """ Returns the whole simulation state as plain records for snapshot.encode() """
+    z = {entity: index for index, entity in enumerate(all_sprites)} # Draw order
+    # Timers due on the same tick fire in the order they were set, stored as a rank
+    pending = sorted(entry for entry in timers.heap if entry[2].active)
+    ranks = {timer: rank for rank, (_, _, timer) in enumerate(pending)}
+
+    def due(timer):
+        """ The tick and rank a timer fires at, -1 if it won't """
+        if timer is None or not timer.active:
+            return -1, 0
+        return timer.due, ranks[timer]
+
+    return {
+        "globals": (tick_count, sim_time, timers.tick, start, boss_exists, gunner_count,
+                    score_screen, won, final_score),
+        "random": random.getstate(),
+        "player": [(z.get(player, 0), *player.rect.topleft, player.health, player.score, player.cooldown,
+                    player.loaded, *due(player.reload_timer))],
+        "enemies": [(z[entity], *entity.rect.topleft, entity.speed, entity.direction) for entity in enemies],
+        "bullets": [(z[entity], *entity.rect.topleft, entity.velocity) for entity in bullets],
+        "explosions": [(z[entity], *entity.rect.topleft, *due(entity.expiry)) for entity in explosions],
+        "gunners": [(z[entity], *entity.rect.topleft, entity.move_up) for entity in gunner],
+        "boss": [(z[entity], *entity.rect.topleft, entity.health, entity.move_up, *due(entity.attack_timer))
+                 for entity in boss],
+        "attacks": [(z[entity], *entity.rect.topleft, entity.velocity) for entity in boss_attack],
+        "powerups": [(z[entity], *entity.rect.topleft, entity.power == "DMG", entity.activated, *due(entity.expiry))
+                     for entity in powerups],
+    }
+
+
+def restore_world(world):
+    """ Replaces the simulation state with a world from capture_world() or snapshot.decode()
+
+    Sprites are created again in their old draw order and timers are set
+    again in the order they were first set, so the game goes on exactly as
+    it would have from the moment it was captured.
+    """
+    global player, the_boss, tick_count, sim_time, start, boss_exists, gunner_count, score_screen, won, final_score
+    for pool in pools:
+        pool.reclaim()
+    for group in (enemies, bullets, explosions, boss, boss_attack, gunner, powerups, all_sprites):
+        group.empty()
+    timers.clear()
+    (tick_count, sim_time, timers.tick, start, boss_exists, gunner_count,
+     score_screen, won, final_score) = world["globals"]
+    the_boss = None
+
+    def place(entity, x, y):
+        entity.rect.topleft = (x, y)
+        # A store copied the spawn position, give it the real one
+        store = entity.pool.store if isinstance(entity, PooledSprite) else None
+        if store is not None:
+            store.remove(entity)
+            store.add(entity)
+        return entity
+
+    def restore_player(x, y, health, score, cooldown, loaded, due, rank):
+        global player
+        player = Player()
+        timers.cancel(player.reload_timer)
+        player.health, player.score, player.cooldown, player.loaded = health, score, cooldown, loaded
+        all_sprites.add(player)
+        player.rect.topleft = (x, y)
+        player.reload_timer = None
+        return [(due, rank, player, "reload_timer", player.reload, None)]
+
+    def restore_enemy(x, y, speed, direction):
+        entity = enemy_pool.acquire()
+        entity.speed, entity.direction = speed, direction
+        place(entity, x, y)
+        return []
+
+    def restore_bullet(x, y, velocity):
+        place(bullet_pool.acquire((0, 0), velocity), x, y)
+        return []
+
+    def restore_explosion(x, y, due, rank):
+        entity = explosion_pool.acquire((0, 0), 0)
+        timers.cancel(entity.expiry)
+        place(entity, x, y)
+        return [(due, rank, entity, "expiry", entity.kill, "Explosion.kill")]
+
+    def restore_gunner(x, y, move_up):
+        entity = Gunner(0, move_up)
+        entity.rect.topleft = (x, y)
+        gunner.add(entity)
+        all_sprites.add(entity)
+        return []
+
+    def restore_boss(x, y, health, move_up, due, rank):
+        global the_boss
+        the_boss = Boss(0, 0, move_up, health)
+        timers.cancel(the_boss.attack_timer)
+        the_boss.rect.topleft = (x, y)
+        boss.add(the_boss)
+        all_sprites.add(the_boss)
+        return [(due, rank, the_boss, "attack_timer", the_boss.attack, None)]
+
+    def restore_attack(x, y, velocity):
+        place(attack_pool.acquire(0, 0, velocity), x, y)
+        return []
+
+    def restore_powerup(x, y, damage, activated, due, rank):
+        entity = PowerUp("DMG" if damage else "HP", (0, 0))
+        timers.cancel(entity.expiry)
+        entity.rect.topleft = (x, y)
+        entity.activated = activated
+        powerups.add(entity)
+        all_sprites.add(entity)
+        if activated:
+            return [(due, rank, entity, "expiry", entity.deactivate, None)]
+        return [(due, rank, entity, "expiry", entity.kill, "PowerUp.kill")]
+
+    restorers = {
+        "player": restore_player,
+        "enemies": restore_enemy,
+        "bullets": restore_bullet,
+        "explosions": restore_explosion,
+        "gunners": restore_gunner,
+        "boss": restore_boss,
+        "attacks": restore_attack,
+        "powerups": restore_powerup,
+    }
+    records = sorted(
+        (fields[0], name, fields[1:]) for name in restorers for fields in world[name]
+    )
+    pending = [] # Timers to set again
+    for _, name, fields in records:
+        pending.extend(restorers[name](*fields))
+    for due, _, entity, attribute, callback, timer_name in sorted(pending, key=lambda timer: timer[:2]):
+        if due >= 0:
+            setattr(entity, attribute, timers.at(due, callback, name=timer_name))
+
+    # Restoring spawned sprites with random positions, so the generator goes last
+    random.setstate(world["random"])
+
+
+def save_snapshot():
+    """ Returns the world packed as a binary snapshot """
+    return snapshot.encode(capture_world())
+
+
+def load_snapshot(data):
+    """ Puts the world back to a binary snapshot """
+    restore_world(snapshot.decode(data))
+
+
+def set_idle(idle):
+    """ Stops the spawn timers and the music while nothing is simulated, or starts them again
+
+    Idle screens sleep until an event comes, so nothing may keep sending them.
+    """
+    if not spawn_timers:
+        return
+    pygame.time.set_timer(ADDENEMY, 0 if idle else ENEMY_INTERVAL)
+    if idle:
+        pygame.mixer.music.pause()
+    else:
+        pygame.mixer.music.unpause()
+
+
+def draw_paused():
+    """ Draws the frozen game with PAUSED over it """
+    renderer.invalidate()
+    draw_world()
+    label = hud_text.render("PAUSED", HUD_COLOR, PAUSE_SIZE)
+    renderer.blit(label, label.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+    renderer.present()
+
+
+def pause():
+    """ Freezes the game until P is pressed again, returns False if the player quit meanwhile
+
+    Like the score screen it draws once and sleeps in wait_event() until
+    something happens.
+    """
+    # Only needed once the game is paused, so it stays out of startup
+    import scorescreen
+    set_idle(True)
+    draw_paused()
+    while True:
+        event = scorescreen.wait_event()
+        if event.type in QUIT_EVENTS or (event.type == KEYDOWN and event.key == K_ESCAPE):
+            resume = False
+            break
+        if event.type == KEYDOWN and event.key == K_p:
+            resume = True
+            break
+        if event.type in scorescreen.REDRAW_EVENTS:
+            draw_paused()
+    set_idle(False)
+    renderer.invalidate()
+    return resume
+
+
+def take_snapshots(keys, rollback=None, rewind_ticks=0):
+    """ Runs the queued quick save (F5), quick load (F9) and rewind (F6) keys and fills the rollback buffer
+
+    Only call it while the simulation is idle. Returns True if the world was
+    replaced, so the frame in flight is stale.
+    """
+    changed = False
+    for key in keys:
+        if key == K_F5:
+            # Write next to the save and swap it in, so a crash never leaves half a file
+            temp = f"{QUICKSAVE_PATH}.{os.getpid()}.tmp"
+            with open(temp, "wb") as file:
+                file.write(save_snapshot())
+            os.replace(temp, QUICKSAVE_PATH)
+        elif key == K_F9 and os.path.exists(QUICKSAVE_PATH):
+            with open(QUICKSAVE_PATH, "rb") as file:
+                data = file.read()
+            try:
+                load_snapshot(data)
+            except (ValueError, struct.error) as error:
+                # Left by an older version of the game or cut short, the game goes on
+                print(f"can't load {QUICKSAVE_PATH}: {error}")
+                continue
+            changed = True
+            # What came after the quick save never happened
+            if rollback is not None:
+                rollback.clear()
+        elif key == K_F6 and rollback is not None:
+            entry = rollback.rewind(rewind_ticks)
+            if entry is not None:
+                load_snapshot(entry[1])
+                changed = True
+    keys.clear()
+
+    # Frames that ran no tick have nothing new to keep
+    if rollback is not None and rollback.newest() != tick_count:
+        rollback.push(tick_count, save_snapshot())
+    if changed:
+        renderer.invalidate()
+    return changed
+
+
+def init_game(headless=False, seed=None, dirty_rects=False, broad_phase=True, vectorized=False, sim_rate=SIM_RATE,
+              profile=False, event_log_path=None, event_log_format="jsonl", load_threads=LOAD_THREADS,
+              atlas_path=atlas.CACHE_PATH, window_size=None, render_scale=1, smooth_scale=False, backend="surface",
+              collision="rect"):
+    """ Sets up pygame, assets, sprite groups and game state
+
+    Headless games use SDL's dummy video and audio drivers, skip music and
+    pygame timers, and leave spawn events to the caller. With dirty_rects only
+    the changed parts of the screen are sent to the display each frame.
+    broad_phase=False always tests every pair of sprites, otherwise checks
+    big enough to pay for it go through a spatial hash, and
+    vectorized moves pooled sprites in bulk with NumPy entity stores.
+    sim_rate sets how many fixed simulation ticks make up a second,
+    profile times every phase of the frame and event_log_path turns on the
+    game-event log. load_threads decode the assets while the window opens.
+    Images come from the atlas cache at atlas_path, built on first run, or
+    from the loose PNGs if it is None. The game is drawn into a framebuffer
+    render_scale times SCREEN_WIDTH by SCREEN_HEIGHT and scaled to a window
+    of window_size, smoothly with smooth_scale. Gameplay always happens at
+    SCREEN_WIDTH by SCREEN_HEIGHT. backend "texture" draws with SDL's 2D
+    renderer instead of surface blits, the GPU does the scaling then.
+    collision is one of COLLISION_MODES, "mask" and "occupancy" only count
+    hits on opaque pixels and find the same ones.
+    """
+    global clock, screen, renderer, asset_registry, player, profiler, overlay, hud_text
+    global enemies, bullets, explosions, boss, boss_attack, gunner, powerups, all_sprites
+    global bullet_pool, enemy_pool, explosion_pool, attack_pool, pools, stores
+    global enemy_grid, gunner_grid, attack_grid, bullet_grid, narrow_phase
+    global sounds, event_log, tick_count, sim_time, timers, governor
+    global running, score_screen, won, final_score, boss_exists, the_boss, gunner_count, start
+    global tick_seconds, step, spawn_timers, background, scrolling
+
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    # Same seed gives the same spawns, speeds and power-ups every run
+    if seed is not None:
+        random.seed(seed)
+
+    begin = time.perf_counter()
+
+    # Setup for sounds, defaults are good
+    pygame.mixer.init()
+
+    # Decode images and sounds on worker threads while the window opens,
+    # converting the images has to wait for the display mode
+    loader = ThreadPoolExecutor(load_threads, "loader") if load_threads else None
+    load_images = asset_registry is None
+    load_sounds = sounds is None
+    if load_images:
+        asset_registry = AssetRegistry()
+        if loader and atlas_path is None:
+            asset_registry.start_loading(loader)
+    if load_sounds:
+        sounds = SoundManager(SOUND_CHANNELS)
+        if loader:
+            sounds.start_loading(loader, SOUNDS)
+    # Sound source: http://ccmixter.org/files/Apoxode/59262
+    # License: https://creativecommons.org/licenses/by/3.0/
+    music = None
+    if not headless and loader:
+        music = loader.submit(pygame.mixer.music.load, "Apoxode_-_Electric_1.mp3")
+
+    # Initialize pygame
+    pygame.init()
+
+    # Setup the clock for a decent framerate
+    clock = pygame.time.Clock()
+
+    # Create the screen object
+    # The size is determined by the constant SCREEN_WIDTH and SCREEN_HEIGHT unless a window size is given
+    window_size = window_size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+    if backend == "texture":
+        # The renderer opens its own window, the display only converts images
+        screen = pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        renderer = TextureRenderer((SCREEN_WIDTH, SCREEN_HEIGHT), SKY_COLOR, window_size)
+    else:
+        screen = pygame.display.set_mode(window_size)
+        if window_size != (SCREEN_WIDTH, SCREEN_HEIGHT) or render_scale != 1:
+            renderer = ScaledRenderer(screen, SKY_COLOR, (SCREEN_WIDTH, SCREEN_HEIGHT), render_scale, smooth_scale)
+        elif dirty_rects:
+            renderer = DirtyRenderer(screen, SKY_COLOR)
+        else:
+            renderer = FullRenderer(screen, SKY_COLOR)
+
+    # Show the empty sky right away, the game draws over it once loaded
+    if not headless:
+        renderer.clear()
+        renderer.present()
+    startup_times["first_frame"] = (time.perf_counter() - begin) * 1000
+
+    # Score and health are drawn from cached glyphs
+    hud_text = TextCache()
+
+    # Kills, hits, power-ups and boss events go to a log written off the main thread
+    event_log = EventLog(event_log_path, event_log_format)
+    tick_count = 0
+    sim_time = 0 # Simulated milliseconds
+
+    # Length of a simulation tick, and the movement multiplier for one tick
+    tick_seconds = 1 / sim_rate
+    step = tick_seconds * 1000 / 25 # Can be tweaked to change velocities
+
+    # Cooldowns and lifetimes fire from here instead of counting down every tick
+    timers = Scheduler(tick_seconds)
+
+    # Sheds cosmetic work when frames take longer than the render rate allows,
+    # only the windowed main loop feeds it frame times
+    governor = FrameGovernor(SHED_RENDER, 1000 / FRAMERATE)
+
+    # Per-phase frame timing, the overlay is toggled with F3
+    profiler = FrameProfiler(enabled=profile)
+    overlay = ProfilerOverlay(profiler)
+
+    # Decode, convert and colorkey every image once, sprites share the results
+    if load_images:
+        if atlas_path is not None:
+            atlas.fill(asset_registry, atlas_path)
+        elif loader:
+            asset_registry.finish_loading()
+        else:
+            asset_registry.load_all()
+        if not headless:
+            print(asset_registry.report())
+
+    # The sky and clouds are drawn from pre-rendered layers from now on.
+    # Dirty rects keep them still, scrolling would change every pixel
+    if background is None:
+        background = ParallaxBackground((SCREEN_WIDTH, SCREEN_HEIGHT), SKY_TOP_COLOR, SKY_COLOR,
+                                        asset_registry.image("cloud"))
+    scrolling = not dirty_rects
+    renderer.background = background.color if scrolling else background.still()
+
+    # Create the custom event for adding a new enemy
+    spawn_timers = not headless
+    set_idle(False)
+
+    # Create our 'player'
+    player = Player()
+
+    # Create groups to hold enemy sprites, bullet sprites, and all sprites
+    # - enemies is used for collision detection and position updates
+    # - bullets is used for position updates
+    # - explosions is used for lifetime updates on explosions
+    # - all_sprites isused for rendering
+    enemies = pygame.sprite.Group()
+    bullets = pygame.sprite.Group()
+    explosions = pygame.sprite.Group()
+    boss = pygame.sprite.Group()
+    boss_attack = pygame.sprite.Group()
+    gunner = pygame.sprite.Group()
+    powerups = pygame.sprite.Group()
+    all_sprites = pygame.sprite.Group()
+    all_sprites.add(player)
 
-# Initialize pygame
-pygame.init()
+    # Optionally move and cull the pooled sprites in bulk instead of per sprite
+    stores = {}
+    if vectorized:
+        bounds = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        size = lambda name: asset_registry.image(name).get_size()
+        stores[bullets] = EntityStore(size("player_missile"), bounds, cull_right=True)
+        stores[enemies] = EntityStore(size("paper_plane"), bounds, cull_left=True, bounce=True)
+        stores[boss_attack] = EntityStore(size("boss_attack1"), bounds, cull_left=True)
+
+    # Pools recycle the high-churn sprites and re-add them to their groups
+    bullet_pool = SpritePool(Bullet, (bullets, all_sprites), POOL_CAPS["bullets"], stores.get(bullets))
+    enemy_pool = SpritePool(Enemy, (enemies, all_sprites), POOL_CAPS["enemies"], stores.get(enemies))
+    explosion_pool = SpritePool(Explosion, (explosions, all_sprites), POOL_CAPS["explosions"], stores.get(explosions))
+    attack_pool = SpritePool(Attack, (boss_attack, all_sprites), POOL_CAPS["boss_attack"], stores.get(boss_attack))
+    pools = (bullet_pool, enemy_pool, explosion_pool, attack_pool)
+
+    # Spatial hashes so big collision checks only test nearby sprites, at
+    # normal sprite counts every pair is tested
+    narrow_phase = None if collision == "rect" else pygame.sprite.collide_mask
+    grid = lambda: SpatialHash(enabled=broad_phase, collided=narrow_phase)
+    if collision == "occupancy":
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        enemy_grid, gunner_grid, attack_grid, bullet_grid = (OccupancyMask(size, grid()) for _ in range(4))
+    else:
+        enemy_grid, gunner_grid, attack_grid, bullet_grid = (grid() for _ in range(4))
+
+    # Load and play our background music
+    if not headless:
+        if music is not None:
+            music.result()
+        else:
+            pygame.mixer.music.load("Apoxode_-_Electric_1.mp3")
+        pygame.mixer.music.play(loops=-1)
 
-# Setup the clock for a decent framerate
-clock = pygame.time.Clock()
+    # Load all our sound files up front, they play on a fixed pool of channels
+    if load_sounds:
+        if loader:
+            sounds.finish_loading()
+        else:
+            sounds.load_all(SOUNDS)
+    if loader:
+        loader.shutdown()
 
-# Create the screen object
-# The size is determined by the constant SCREEN_WIDTH and SCREEN_HEIGHT
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Variable to keep our main loop running
+    running = True
+    score_screen = False
+    won = False
+    final_score = 0
+    # Variable used when enemies spawns
+    boss_exists = False
+    the_boss = None
+    gunner_count = 0
 
-# Import from other files
-import scorescreen
+    start = 0
 
-# Create custom events for adding a new enemy and cloud
-ADDENEMY = pygame.USEREVENT + 1
-pygame.time.set_timer(ADDENEMY, 250)
-ADDCLOUD = pygame.USEREVENT + 2
-pygame.time.set_timer(ADDCLOUD, 1000)
-
-# Create our 'player'
-player = Player()
-
-
-
-# Create groups to hold enemy sprites, cloud sprites, and all sprites
-# - enemies is used for collision detection and position updates
-# - clouds is used for position updates
-# - bullets is used for position updates
-# - explosions is used for lifetime updates on explosions
-# - all_sprites isused for rendering
-enemies = pygame.sprite.Group()
-clouds = pygame.sprite.Group()
-bullets = pygame.sprite.Group()
-explosions = pygame.sprite.Group()
-boss = pygame.sprite.Group()
-boss_attack = pygame.sprite.Group()
-gunner = pygame.sprite.Group()
-powerups = pygame.sprite.Group()
-all_sprites = pygame.sprite.Group()
-all_sprites.add(player)
-
-# Load and play our background music
-# Sound source: http://ccmixter.org/files/Apoxode/59262
-# License: https://creativecommons.org/licenses/by/3.0/
-pygame.mixer.music.load("Apoxode_-_Electric_1.mp3")
-pygame.mixer.music.play(loops=-1)
-
-# Load all our sound files
-# Sound sources: Jon Fincher
-move_up_sound = pygame.mixer.Sound("Rising_putter.ogg")
-move_down_sound = pygame.mixer.Sound("Falling_putter.ogg")
-collision_sound = pygame.mixer.Sound("Collision.ogg")
-
-# Set the base volume for all sounds
-move_up_sound.set_volume(0.5)
-move_down_sound.set_volume(0.5)
-collision_sound.set_volume(0.5)
-
-# Variable to keep our main loop running
-running = True
-score_screen = False
-won = False
-# Variable used when enemies spawns
-boss_exists = False
-gunner_exists = False
-gunner_count = 0
-
-start=pygame.time.get_ticks()
-
-# Our main loop
-while running:
-    # Code that runs during score screen
-    while score_screen:
-        (score_screen, running, won) = scorescreen.display_screen(screen, final_score, won)
-
-    # Look at every event in the queue
-    for event in pygame.event.get():
-        # Did the user hit a key?
-        if event.type == KEYDOWN:
-            # Was it the Escape key? If so, stop the loop
-            if event.key == K_ESCAPE:
-                running = False
+    startup_times["interactive"] = (time.perf_counter() - begin) * 1000
 
-        # Did the user click the window close button? If so, stop the loop
-        elif event.type == QUIT:
-            running = False
 
+def handle_events(events):
+    """ Spawns enemies for timer events """
+    for event in events:
         # Should we add a new enemy?
-        elif event.type == ADDENEMY:
+        if event.type == ADDENEMY:
             # Create the new enemy, and add it to our sprite groups
-            new_enemy = Enemy()
-            enemies.add(new_enemy)
-            all_sprites.add(new_enemy)
-
-        # Should we add a new cloud?
-        elif event.type == ADDCLOUD:
-            # Create the new cloud, and add it to our sprite groups
-            new_cloud = Cloud()
-            clouds.add(new_cloud)
-            all_sprites.add(new_cloud)
-
-    # Get the set of keys pressed and check for user input
-    pressed_keys = pygame.key.get_pressed()
+            enemy_pool.acquire()
+
+
+def update_group(group):
+    """ Updates a sprite group, in bulk if it has an entity store """
+    store = stores.get(group)
+    if store is None:
+        group.update()
+    else:
+        store.step(step)
+        store.sync()
+
+
+def update_sprites(pressed_keys):
+    """ Moves the player and every sprite group """
+    # Check for user input
     player.update(pressed_keys)
 
     # Updates 
-    enemies.update()
-    clouds.update()
-    bullets.update()
-    explosions.update()
-    powerups.update()
+    update_group(enemies)
+    update_group(bullets)
+    update_group(explosions)
     boss.update()
-    boss_attack.update()
+    update_group(boss_attack)
 
     # Update Gunner
     gunner.update()
 
 
-    # Fill the screen with sky blue
-    screen.fill((135, 206, 250))
+def check_collisions(now):
+    """ Resolves collisions, scoring and timed spawns for one frame
 
-    # Draw all our sprites
-    for entity in all_sprites:
-        screen.blit(entity.surf, entity.rect)
+    now is the game time in milliseconds used to space out gunner spawns.
+    """
+    global player, score_screen, won, final_score, boss_exists, the_boss, gunner_count, start
+
+    # Bucket sprites once per frame, killed sprites are skipped by the checks
+    enemy_grid.rebuild(enemies)
+    gunner_grid.rebuild(gunner)
+    attack_grid.rebuild(boss_attack)
+    bullet_grid.rebuild(bullets)
 
     # Check if any enemies or the boss attack have collided with the player
-    player_col = pygame.sprite.spritecollide(player, enemies, True)
-    playerboss_attack_col = pygame.sprite.spritecollide(player, boss_attack, True)
+    player_col = enemy_grid.spritecollide(player, enemies, True)
+    playerboss_attack_col = attack_grid.spritecollide(player, boss_attack, True)
     # Check if player has collided with gunner
-    gunner_col = pygame.sprite.spritecollide(player, gunner, True)
+    gunner_col = gunner_grid.spritecollide(player, gunner, True)
 
     # Check if player has collided with boss
-    playerboss_col = pygame.sprite.spritecollide(player, boss, False)
+    playerboss_col = pygame.sprite.spritecollide(player, boss, False, narrow_phase)
 
     if player_col or playerboss_attack_col:
         # If so, reduce the player's HP
         player.health -= 1
-        collision_sound.play()
-        new_explosion = Explosion(player.rect.center, .25)
-        explosions.add(new_explosion)
-        all_sprites.add(new_explosion)
+        sounds.play("collision")
+        explosion_pool.acquire(player.rect.center, .25)
+        event_log.log("hit", tick_count, player.health, player.rect.center)
 
     # If out of HP or collided with boss, end game
     if player.health <= 0 or playerboss_col or gunner_col:
         player.kill()
 
         # Stop any moving sounds and play the collision sound
-        move_up_sound.stop()
-        move_down_sound.stop()
-        collision_sound.play()
+        sounds.stop("move_up")
+        sounds.stop("move_down")
+        sounds.play("collision")
 
         # Go to score screen and reset game
         final_score = player.score
+        event_log.log("death", tick_count, final_score, player.rect.center)
         boss_exists = False
         player = reset()
         score_screen = True
 
 
     # Check if any bullets have collided with an enemy and removes both if so
-    bullet_col = pygame.sprite.groupcollide(bullets, enemies, True, True)
-    gunner_col = pygame.sprite.groupcollide(bullets, gunner, True, True)
+    bullet_col = enemy_grid.groupcollide(bullets, enemies, True, True)
+    gunner_col = gunner_grid.groupcollide(bullets, gunner, True, True)
     
 
     for bullet in gunner_col.keys():
         player.score += 20
-        print(player.score)
-        collision_sound.play()
+        event_log.log("gunner_kill", tick_count, player.score, bullet.rect.center)
+        sounds.play("collision")
         gunner_count -=1
-        new_explosion = Explosion(bullet.rect.center, .5)
-        explosions.add(new_explosion)
-        all_sprites.add(new_explosion)
+        explosion_pool.acquire(bullet.rect.center, .5)
 
     # For every collision, create an explosion at given position
     for bullet in bullet_col.keys():
-        new_explosion = Explosion(bullet.rect.center, .5)
-        explosions.add(new_explosion)
-        all_sprites.add(new_explosion)
+        explosion_pool.acquire(bullet.rect.center, .5)
         player.score += 10
-        print(player.score)
+        event_log.log("kill", tick_count, player.score, bullet.rect.center)
 
         # Spawn powerup 
-        if random.randint(1, 10) >= 9:
+        if random.randint(1, 10) >= POWERUP_ROLL:
             power = random.randint(1, 2)
             if power == 1:
                 powerup = PowerUp("HP", bullet.rect.center)
@@ -516,11 +1018,11 @@ while running:
     if powerup_col:
         for powerup in powerup_col:
             powerup.activate()
+            event_log.log("powerup", tick_count, POWER_CODES[powerup.power], powerup.rect.center)
             powerup.rect.center = (-100, -100)
     
-    now = pygame.time.get_ticks()
     # Creates a new gunner every 5 seconds and a maximum of 6 at once
-    if now - start > 5000 and gunner_count < 6:
+    if now - start > GUNNER_INTERVAL and gunner_count < GUNNER_CAP:
         start = now
         spawn_gunner = Gunner(SCREEN_WIDTH+200, False)
         gunner.add(spawn_gunner)
@@ -528,54 +1030,458 @@ while running:
         gunner_count +=1 #Add gunner count to represent capacity to gunner maximum
 
     # Creates boss at fixed position when plyer.score reaches 10
-    if not boss_exists and player.score >= 200:
-        the_boss = Boss(1000, 300, False, 50)
+    if not boss_exists and player.score >= BOSS_SCORE:
+        the_boss = Boss(1000, 300, False, BOSS_HEALTH)
         boss.add(the_boss)
         all_sprites.add(the_boss)
         # to make sure multible bosses doesn't spawn
         boss_exists = True
+        event_log.log("boss_spawn", tick_count, the_boss.health, the_boss.rect.center)
 
-    if boss_exists:
-        pygame.draw.rect(screen, (0,0,0), (195, 550, 412.5, 17 ))
-        pygame.draw.rect(screen, (255,0,0), (195, 550, the_boss.health*8.25, 17 ))
-        healthbar = pygame.image.load("healthbar.png").convert_alpha()
-        screen.blit(healthbar, [185, 544])
+    profiler.mark("collide")
 
     if boss_exists:
-        for bullet in bullets:
-            boss_col = pygame.sprite.spritecollide(bullet, boss, False, pygame.sprite.collide_mask)
+        # Only bullets near the boss get the pixel-perfect mask test, with
+        # occupancy masks only when the boss covers any bullet pixel at all
+        boss_col = bullet_grid.spritecollide(the_boss, bullets, False, pygame.sprite.collide_mask)
+
+        for bullet in boss_col:
+            explosion_pool.acquire(bullet.rect.center, .25)
+            bullet.kill()
+
+            the_boss.health -= 1
+            event_log.log("boss_hit", tick_count, the_boss.health, bullet.rect.center)
+
+            if the_boss.health <= 0:
+                player.score += 500
+                won = True
+                event_log.log("boss_kill", tick_count, player.score, the_boss.rect.center)
+
+                the_boss.kill()
+                player.kill()
+
+                sounds.stop("move_up")
+                sounds.stop("move_down")
+                sounds.play("collision")
+
+                final_score = player.score
+                boss_exists = False
+                player = reset()
+                score_screen = True
+                # Boss and bullets are gone, nothing left to hit
+                break
+
+    profiler.mark("boss")
+
+
+def update_world(pressed_keys, events, now):
+    """ Advances the simulation by one tick without drawing anything
+
+    now is the simulated time in milliseconds.
+    """
+    global tick_count
+    tick_count += 1
+    timers.advance()
+    handle_events(events)
+    update_sprites(pressed_keys)
+    profiler.mark("update")
+    check_collisions(now)
+
+
+def group_counts():
+    """ Returns how many sprites each group holds """
+    return {
+        "enemies": len(enemies),
+        "bullets": len(bullets),
+        "explosions": len(explosions),
+        "powerups": len(powerups),
+        "boss": len(boss),
+        "boss_attack": len(boss_attack),
+        "gunner": len(gunner),
+        "all": len(all_sprites),
+        "timers": timers.pending,
+        "governor": governor.level,
+    }
+
+
+def spawn_key(entity):
+    """ Returns what sprite_positions() keys a sprite by, a pooled sprite handed out again is a new one """
+    return (entity, getattr(entity, "generation", 0))
+
+
+def sprite_positions():
+    """ Returns where every sprite is, to interpolate the next tick against """
+    return {spawn_key(entity): entity.rect.topleft for entity in all_sprites}
+
+
+def shed_spawns(events):
+    """ Drops the spawn events the governor's level calls for """
+    if governor.level < SHED_SPAWNS or len(enemies) < SHED_ENEMY_CAP:
+        return events
+    return [event for event in events if event.type != ADDENEMY]
+
+
+def run_tick(pressed_keys, events):
+    """ Runs one simulation tick at the current simulated time and advances it """
+    global sim_time
+    update_world(pressed_keys, events, sim_time)
+    sim_time += tick_seconds * 1000
+
+
+def run_ticks(ticks, pressed_keys, events, reduced, recording=None):
+    """ Runs the ticks of one frame, returns the sprite positions before the last one
+
+    events go to the first tick and recording gets every tick that ran. The
+    positions are None when reduced or no tick ran, the frame isn't
+    interpolated then.
+    """
+    previous = None
+    for tick in range(ticks):
+        if tick == ticks - 1 and not reduced:
+            previous = sprite_positions()
+        if recording is not None:
+            recording.record(pressed_keys, events)
+        run_tick(pressed_keys, events)
+        events = []
+        if score_screen:
+            break
+    return previous
 
-            if boss_col:
-                new_explosion = Explosion(bullet.rect.center, .25)
-                explosions.add(new_explosion)
-                all_sprites.add(new_explosion)
-                bullet.kill()
 
-                the_boss.health -= 1
+def simulate_frame(ticks, pressed_keys, events, alpha, reduced, frame, recording=None):
+    """ Runs the ticks of one frame and captures the result into the FrameSnapshot frame
 
-                if the_boss.health <= 0:
-                    player.score += 500
-                    won = True
+    This is what the simulation thread does in the pipelined loop.
+    """
+    frame.capture(alpha, run_ticks(ticks, pressed_keys, events, reduced, recording), reduced)
+    return frame
 
-                    the_boss.kill()
-                    player.kill()
 
-                    move_up_sound.stop()
-                    move_down_sound.stop()
-                    collision_sound.play()
+def frame_seconds(alpha, previous):
+    """ Returns the simulated seconds a frame drawn with alpha and previous shows """
+    if previous is None or alpha >= 1:
+        return sim_time / 1000
+    # Interpolated frames show a moment during the last tick
+    return sim_time / 1000 - (1 - alpha) * tick_seconds
 
-                    final_score = player.score
-                    boss_exists = False
-                    player = reset()
-                    score_screen = True
-        
-    # Flip everything to the display
-    pygame.display.flip()
 
-    # Ensure we maintain a FRAMERATE frames per second rate
-    delta = clock.tick(FRAMERATE)
-    step = delta / 25 # Can be tweaked to change velocities
+def draw_background(seconds):
+    """ Erases the last frame and draws the sky and clouds as they are seconds into the game """
+    renderer.clear()
+    if scrolling:
+        background.draw(renderer.blit, seconds, 1 if governor.level >= SHED_CLOUDS else None)
+
+
+def draw_world(alpha=1, previous=None, reduced=False):
+    """ Draws the sky, every sprite and the boss health bar to the screen
+
+    With previous positions from sprite_positions(), sprites are drawn alpha
+    of the way from there to where they are now. reduced leaves out the
+    explosions.
+    """
+    draw_background(frame_seconds(alpha, previous))
+
+    # Draw all our sprites
+    if reduced:
+        for entity in all_sprites:
+            if not explosions.has_internal(entity):
+                renderer.blit(entity.surf, entity.rect)
+    elif previous is None or alpha >= 1:
+        for entity in all_sprites:
+            renderer.blit(entity.surf, entity.rect)
+    else:
+        for entity in all_sprites:
+            left, top = entity.rect.topleft
+            # Sprites spawned during the last tick have nowhere to come from, even
+            # when the pool hands out one that died during it
+            from_left, from_top = previous.get(spawn_key(entity), (left, top))
+            renderer.blit(entity.surf, (
+                round(from_left + (left - from_left) * alpha),
+                round(from_top + (top - from_top) * alpha),
+            ))
+
+    draw_hud(player.score, player.health)
+    if boss_exists:
+        draw_boss_bar(the_boss.health)
+
+
+def draw_snapshot(frame):
+    """ Draws a FrameSnapshot like draw_world() draws the live game """
+    draw_background(frame.seconds)
+    blit = renderer.blit
+    alpha = frame.alpha
+    if alpha >= 1:
+        for surf, _, topleft in frame.sprites:
+            blit(surf, topleft)
+    else:
+        for surf, (from_left, from_top), (left, top) in frame.sprites:
+            blit(surf, (
+                round(from_left + (left - from_left) * alpha),
+                round(from_top + (top - from_top) * alpha),
+            ))
+
+    draw_hud(frame.score, frame.health)
+    if frame.boss_health is not None:
+        draw_boss_bar(frame.boss_health)
+
+
+def draw_hud(score, health):
+    """ Draws the score and the player's health in the top right corner """
+    blit = renderer.blit
+    x = SCREEN_WIDTH - 240
+    x = blit(hud_text.render("Score ", HUD_COLOR, HUD_SIZE), (x, 8)).right
+    x = hud_text.draw(blit, str(score), HUD_COLOR, HUD_SIZE, (x, 8))
+    x = blit(hud_text.render("   HP ", HUD_COLOR, HUD_SIZE), (x, 8)).right
+    hud_text.draw(blit, str(health), HUD_COLOR, HUD_SIZE, (x, 8))
+
+
+def draw_boss_bar(health):
+    """ Draws the boss health bar along the bottom """
+    # The health bar image covers both bars, so blitting it marks them dirty too
+    renderer.rect((0,0,0), (195, 550, 412.5, 17 ))
+    renderer.rect((255,0,0), (195, 550, health * 412.5 / BOSS_HEALTH, 17 ))
+    renderer.blit(asset_registry.image("healthbar"), [185, 544])
+
+
+def window_size(text):
+    """ Parses a WIDTHxHEIGHT argument """
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dodge and shoot down planes until the boss falls")
+    parser.add_argument("--dirty", action="store_true", help="only update the parts of the screen that changed")
+    parser.add_argument("--vectorized", action="store_true", help="move sprites in bulk with NumPy (needs numpy)")
+    parser.add_argument("--renderer", choices=("surface", "texture"), default="surface",
+                        help="draw with surface blits or with SDL's texture renderer")
+    parser.add_argument("--window", type=window_size, help="window size as WIDTHxHEIGHT, the game is scaled to fit")
+    parser.add_argument("--render-scale", type=float, default=1,
+                        help=f"draw at this times {SCREEN_WIDTH}x{SCREEN_HEIGHT} before scaling to the window")
+    parser.add_argument("--smooth", action="store_true", help="scale to the window with smoothscale")
+    parser.add_argument("--collision", choices=COLLISION_MODES, default="rect",
+                        help="hit test by rects, by pixels per sprite or by pixels through one mask per group")
+    parser.add_argument("--brute", action="store_true",
+                        help="test every pair of sprites even when there are enough for the spatial hash")
+    parser.add_argument("--fps", type=int, default=FRAMERATE, help="render frames per second, 0 for uncapped")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate the next frame on a thread while this one is drawn")
+    parser.add_argument("--frame-budget", type=float, default=1000 / FRAMERATE,
+                        help="ms a frame may take before effects are shed, 0 never sheds")
+    parser.add_argument("--sim-rate", type=int, default=SIM_RATE, help="simulation ticks per second")
+    parser.add_argument("--seed", type=int, help="seed the spawns to replay a game")
+    parser.add_argument("--record", help="record every tick of input here for replay.py")
+    parser.add_argument("--event-log", help="write kills, hits, power-ups and boss events here")
+    parser.add_argument("--event-format", choices=("jsonl", "binary"), default="jsonl")
+    parser.add_argument("--profile", action="store_true", help="time every frame phase, F3 shows the overlay")
+    parser.add_argument("--profile-out", help="write the frame times here on exit")
+    parser.add_argument("--profile-format", choices=("json", "csv", "chrome"), default="json")
+    parser.add_argument("--rollback", type=float, default=0,
+                        help="keep this many seconds of snapshots for F6 to rewind to, 0 turns F6 off")
+    parser.add_argument("--no-atlas", action="store_true", help="decode the loose PNGs instead of the sprite atlas")
+    parser.add_argument("--scores", default=SCORES_PATH, help="keep every score here for the high score table, "
+                                                              "an empty path keeps none")
+    args = parser.parse_args()
+    if args.pipelined and (args.profile or args.profile_out):
+        parser.error("--pipelined can't be combined with profiling, the phases run on two threads")
+    if args.dirty and (args.window or args.render_scale != 1):
+        parser.error("--dirty needs the window and the framebuffer at the same size")
+    if args.renderer == "texture" and (args.dirty or args.render_scale != 1):
+        parser.error("--dirty and --render-scale only apply to the surface renderer")
+    if args.render_scale <= 0:
+        parser.error("--render-scale must be above 0")
+    if args.record and args.rollback:
+        parser.error("--rollback can't be combined with --record, a replay can't follow a rewind")
+    if args.record and args.collision != "rect":
+        parser.error("--record needs --collision rect, replays test collisions by rect")
+    return args
+
+
+def main():
+    """ Runs the game in a window until the player quits """
+    global running, score_screen, won
+    global scorescreen
+
+    args = parse_args()
+    # Recordings need a known seed to replay the same spawns
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.randrange(2 ** 32)
+    init_game(seed=seed, dirty_rects=args.dirty, vectorized=args.vectorized, sim_rate=args.sim_rate,
+              profile=args.profile or args.profile_out is not None,
+              event_log_path=args.event_log, event_log_format=args.event_format,
+              atlas_path=None if args.no_atlas else atlas.CACHE_PATH,
+              window_size=args.window, render_scale=args.render_scale, smooth_scale=args.smooth,
+              backend=args.renderer, collision=args.collision, broad_phase=not args.brute)
+    print(f"first frame after {startup_times['first_frame']:.1f} ms, "
+          f"interactive after {startup_times['interactive']:.1f} ms")
+    timestep = FixedTimestep(args.sim_rate)
+    governor.budget_ms = args.frame_budget
+    governor.enabled = args.frame_budget > 0
+    recording = None
+    if args.record:
+        from replay import Recording
+        recording = Recording(seed, args.sim_rate)
+    pending_events = [] # Events waiting for the next tick
+    previous = None
+    frame_time = 0
+    # In the pipelined loop the thread fills one snapshot while the other is drawn
+    sim_thread = SimThread(simulate_frame) if args.pipelined else None
+    snapshots = (FrameSnapshot(), FrameSnapshot())
+    # One world snapshot per tick that was drawn, for F6 to step back to
+    rollback = None
+    rewind_ticks = round(args.rollback * args.sim_rate)
+    if args.rollback > 0:
+        rollback = snapshot.RollbackBuffer(rewind_ticks)
+    snapshot_keys = [] # F5, F6 and F9 presses waiting for the simulation to be idle
+    paused = False
+    scores = HighScores(args.scores, TOP_SCORES) if args.scores else None
+
+    # Our main loop
+    while running:
+        # Code that runs during score screen
+        if score_screen:
+            # Only needed once the first game ends, so it stays out of startup
+            import scorescreen
+            set_idle(True)
+            table = new = None
+            if scores is not None:
+                # Only queued here, the writer thread saves it
+                new = scores.add(final_score, won)
+                table = scores.top(SCORE_TABLE)
+            while score_screen:
+                (score_screen, running, won) = scorescreen.display_screen(
+                    renderer.canvas(), final_score, won, renderer.show_canvas, table, new)
+            set_idle(False)
+            # The score screen drew over everything
+            renderer.invalidate()
+            # Don't catch up on the time spent on the score screen
+            clock.tick()
+            timestep.reset()
+            frame_time = 0
+            previous = None
+
+        if paused:
+            # The world has to hold still while it is drawn
+            if sim_thread is not None:
+                sim_thread.wait()
+            running = pause()
+            paused = False
+            # Don't catch up on the time spent paused either
+            clock.tick()
+            timestep.reset()
+            frame_time = 0
+            previous = None
+            continue
+
+        profiler.begin_frame()
+
+        # Look at every event in the queue
+        events = pygame.event.get()
+        for event in events:
+            # Did the user hit a key?
+            if event.type == KEYDOWN:
+                # Was it the Escape key? If so, stop the loop
+                if event.key == K_ESCAPE:
+                    running = False
+                # F3 shows or hides the profiler overlay
+                elif event.key == K_F3 and profiler.enabled:
+                    overlay.toggle()
+                # P freezes the game until it is pressed again
+                elif event.key == K_p:
+                    paused = True
+                # Loading would leave a recording that can't be replayed
+                elif event.key == K_F5 or (event.key in (K_F6, K_F9) and recording is None):
+                    snapshot_keys.append(event.key)
+
+            # Did the user click the window close button? If so, stop the loop
+            # The texture renderer's window only sends WINDOWCLOSE
+            elif event.type in QUIT_EVENTS:
+                running = False
 
-# At this point, we're done, so we can stop and quit the mixer
-pygame.mixer.music.stop()
-pygame.mixer.quit()
+        # Get the set of keys pressed and run as many fixed ticks as the last frame took
+        # Long frames run several ticks without rendering in between
+        pressed_keys = pygame.key.get_pressed()
+        ticks = timestep.advance(frame_time)
+        reduced = governor.level >= SHED_RENDER
+
+        if sim_thread is not None:
+            # Take the frame simulated while the last one was drawn, then start
+            # the next one and draw this one in the meantime. What is on screen
+            # lags the input by a frame
+            ready = sim_thread.wait()
+            if score_screen:
+                continue
+            if take_snapshots(snapshot_keys, rollback, rewind_ticks):
+                ready = None
+                pending_events = []
+            pending_events.extend(shed_spawns(events))
+            target = snapshots[1] if ready is snapshots[0] else snapshots[0]
+            sim_thread.submit(ticks, pressed_keys, pending_events, timestep.alpha, reduced, target, recording)
+            if ticks:
+                pending_events = []
+            if ready is not None:
+                draw_snapshot(ready)
+                renderer.present()
+            frame_time = clock.tick(args.fps) / 1000
+            if governor.record(clock.get_rawtime()):
+                event_log.log("governor", tick_count, governor.level)
+            continue
+
+        if take_snapshots(snapshot_keys, rollback, rewind_ticks):
+            previous = None
+            pending_events = []
+        # Shed before recording, so a replay spawns exactly what this game did
+        pending_events.extend(shed_spawns(events))
+        profiler.mark("events")
+        if ticks:
+            previous = run_ticks(ticks, pressed_keys, pending_events, reduced, recording)
+            pending_events = []
+
+        # Draw between the last two ticks
+        draw_world(timestep.alpha, None if reduced else previous, reduced)
+        counts = group_counts() if profiler.enabled else None
+        overlay.draw(renderer, counts)
+        profiler.mark("draw")
+
+        # Flip everything (or just what changed) to the display
+        renderer.present()
+        profiler.mark("present")
+        profiler.end_frame(counts)
+
+        # Cap the render rate at --fps frames per second
+        frame_time = clock.tick(args.fps) / 1000
+        # The governor looks at the time the frame was busy, not the sleep
+        if governor.record(clock.get_rawtime()):
+            event_log.log("governor", tick_count, governor.level)
+
+    # At this point, we're done, so we can stop and quit the mixer
+    if sim_thread is not None:
+        sim_thread.close()
+    pygame.mixer.music.stop()
+    pygame.mixer.quit()
+    event_log.close()
+    if scores is not None:
+        scores.close()
+    if recording is not None:
+        recording.save(args.record)
+
+    # Report how well the sprite pools kept allocation flat
+    for pool in pools:
+        print(pool.sprite_class.__name__, pool.stats())
+    for name, counters in sounds.stats().items():
+        print(name, counters)
+    print("timers", timers.stats())
+    print("governor", governor.stats())
+
+    if profiler.enabled:
+        print("\n".join(profiler.summary()))
+        if args.profile_out:
+            profiler.dump(args.profile_out, args.profile_format)
+
+
+if __name__ == "__main__":
+    main()
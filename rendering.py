@@ -0,0 +1,292 @@
+import os
+import weakref
+
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError: # Only the texture renderer needs pygame's SDL2 video module
+    video = None
+
+
+class FullRenderer:
+    """ Redraws and flips the whole screen every frame
+
+    background is a color to erase frames with, a surface the size of the
+    screen to draw under them or None when every frame covers the screen.
+    It may be swapped at any time.
+    """
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.pushed_pixels = 0 # Pixels sent to the display last frame
+
+    def invalidate(self):
+        """ Forces the next frame to be drawn in full, nothing to do here """
+
+    def clear(self):
+        """ Erases the last frame """
+        if self.background is None:
+            return
+        if isinstance(self.background, pygame.Surface):
+            self.blit(self.background, (0, 0))
+        else:
+            self.screen.fill(self.background)
+
+    def blit(self, surf, rect):
+        """ Draws a surface at rect """
+        return self.screen.blit(surf, rect)
+
+    def mark(self, rect):
+        """ Records a region that was drawn to the screen directly """
+
+    def rect(self, color, rect):
+        """ Draws a filled rectangle """
+        pygame.draw.rect(self.screen, color, rect)
+
+    def present(self):
+        """ Sends the frame to the display """
+        pygame.display.flip()
+        self.pushed_pixels = self.screen.get_width() * self.screen.get_height()
+
+    def canvas(self):
+        """ Returns a surface to draw a whole screen on by hand, like the score screen """
+        return pygame.display.get_surface()
+
+    def show_canvas(self):
+        """ Puts what was drawn on canvas() on the display """
+        pygame.display.flip()
+
+
+class DirtyRenderer(FullRenderer):
+    """ Only erases and updates the parts of the screen that changed
+
+    Every frame the regions drawn last frame are filled with the background,
+    or copied from it when it is a surface, sprites are blitted and
+    display.update() gets both sets of rects. When the changed area goes
+    above max_dirty of the screen, the whole screen is redrawn and flipped
+    instead, which is cheaper than many small updates.
+    """
+    def __init__(self, screen, background, max_dirty=0.5):
+        super(DirtyRenderer, self).__init__(screen, background)
+        self.max_dirty = max_dirty # Fraction of the screen that triggers a full redraw
+        self.screen_area = screen.get_width() * screen.get_height()
+        self.previous = [] # Regions drawn last frame
+        self.current = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """ Forces the next frame to be drawn in full, e.g. after the score screen """
+        self.full_redraw = True
+
+    def clear(self):
+        """ Erases what was drawn last frame """
+        # Straight to the screen, erasing doesn't make a region dirty by itself
+        regions = [None] if self.full_redraw else self.previous
+        if isinstance(self.background, pygame.Surface):
+            for rect in regions:
+                self.screen.blit(self.background, rect or (0, 0), rect)
+        else:
+            for rect in regions:
+                self.screen.fill(self.background, rect)
+
+    def blit(self, surf, rect):
+        """ Draws a surface at rect and records the region it covered """
+        drawn = self.screen.blit(surf, rect)
+        if drawn.width and drawn.height:
+            self.current.append(drawn)
+        return drawn
+
+    def mark(self, rect):
+        """ Records a region that was drawn to the screen directly """
+        self.current.append(pygame.Rect(rect).clip(self.screen.get_rect()))
+
+    def present(self):
+        """ Sends the changed regions, or the whole frame if too much changed """
+        dirty = self.previous + self.current
+        area = sum(rect.width * rect.height for rect in dirty)
+
+        if self.full_redraw or area > self.max_dirty * self.screen_area:
+            pygame.display.flip()
+            self.pushed_pixels = self.screen_area
+        else:
+            pygame.display.update(dirty)
+            self.pushed_pixels = area
+
+        # Erase with a full fill next frame if this one was already too busy
+        self.full_redraw = area > self.max_dirty * self.screen_area
+        self.previous = self.current
+        self.current = []
+
+
+class ScaledRenderer(FullRenderer):
+    """ Draws into a framebuffer render_scale times the logical size and scales it to the window
+
+    The game keeps drawing in logical coordinates, blit() scales positions and
+    swaps every surface for a copy at render scale, made the first time it is
+    drawn and dropped once the original is gone. present() scales the whole
+    framebuffer to the largest part of the window with the same aspect ratio,
+    with smoothscale if smooth is set, and leaves black bars around it.
+    """
+    def __init__(self, window, background, size, render_scale=1, smooth=False):
+        width, height = size
+        framebuffer = pygame.Surface((max(1, round(width * render_scale)), max(1, round(height * render_scale))),
+                                     0, window)
+        super(ScaledRenderer, self).__init__(framebuffer, background)
+        self.window = window
+        self.logical = pygame.Rect(0, 0, width, height)
+        self.render_scale = render_scale
+        self.smooth = smooth
+        self.scaled = weakref.WeakKeyDictionary() # Surface: copy at render scale
+
+        # Letterbox the framebuffer, the bars never change
+        window_width, window_height = window.get_size()
+        fit = min(window_width / width, window_height / height)
+        self.viewport = pygame.Rect(0, 0, round(width * fit), round(height * fit))
+        self.viewport.center = window.get_rect().center
+        self.target = window.subsurface(self.viewport)
+        window.fill((0, 0, 0))
+
+    def invalidate(self):
+        """ Clears the bars again, e.g. after the score screen drew over the window """
+        self.window.fill((0, 0, 0))
+
+    def scale(self, surf):
+        """ Returns surf at render scale """
+        scaled = self.scaled.get(surf)
+        if scaled is None:
+            width, height = surf.get_size()
+            size = (max(1, round(width * self.render_scale)), max(1, round(height * self.render_scale)))
+            # Blending would bleed the colorkey into the edges, only per-pixel alpha is smoothed
+            if surf.get_flags() & pygame.SRCALPHA:
+                scaled = pygame.transform.smoothscale(surf, size)
+            else:
+                scaled = pygame.transform.scale(surf, size)
+            self.scaled[surf] = scaled
+        return scaled
+
+    def blit(self, surf, rect):
+        """ Draws a surface at a logical position, returns the logical region it covered """
+        x, y = rect[0], rect[1]
+        if self.render_scale == 1:
+            self.screen.blit(surf, (x, y))
+        else:
+            self.screen.blit(self.scale(surf), (round(x * self.render_scale), round(y * self.render_scale)))
+        return pygame.Rect(x, y, surf.get_width(), surf.get_height()).clip(self.logical)
+
+    def rect(self, color, rect):
+        """ Draws a filled rectangle given in logical coordinates """
+        x, y, width, height = rect
+        scale = self.render_scale
+        pygame.draw.rect(self.screen, color, (x * scale, y * scale, width * scale, height * scale))
+
+    def present(self):
+        """ Scales the framebuffer to the window and flips it """
+        if self.screen.get_size() == self.target.get_size():
+            self.target.blit(self.screen, (0, 0))
+        elif self.smooth:
+            pygame.transform.smoothscale(self.screen, self.target.get_size(), self.target)
+        else:
+            pygame.transform.scale(self.screen, self.target.get_size(), self.target)
+        pygame.display.flip()
+        self.pushed_pixels = self.window.get_width() * self.window.get_height()
+
+
+class TextureRenderer:
+    """ Draws with SDL's 2D renderer from textures instead of blitting surfaces
+
+    Every surface is uploaded as a texture the first time it is drawn, and
+    the texture is dropped once the surface is gone. Copies are queued with
+    SDL's render batching and go out together at present(). When there is no
+    GPU driver, SDL's software renderer is used instead. The renderer's
+    logical size scales the game to the window and letterboxes it.
+
+    background works like it does for the surface renderers.
+
+    pygame's display surface can't share a window with a renderer, so the
+    game gets its own window and the display module only keeps a hidden one
+    for converting images.
+    """
+    def __init__(self, size, background, window_size=None, title="pygame window", vsync=False):
+        if video is None:
+            raise ImportError("the texture renderer needs pygame._sdl2")
+        # Read by SDL when the renderer is created
+        os.environ.setdefault("SDL_RENDER_BATCHING", "1")
+        self.window = video.Window(title, window_size or size)
+        try:
+            self.renderer = video.Renderer(self.window, accelerated=1, vsync=vsync)
+            self.accelerated = True
+        except video.error:
+            self.renderer = video.Renderer(self.window, accelerated=0, vsync=vsync)
+            self.accelerated = False
+        self.renderer.logical_size = size
+        # The software renderer stretches every copy on its own, it is much
+        # cheaper to draw at the logical size and stretch the frame once
+        self.frame = None
+        if not self.accelerated and self.window.size != tuple(size):
+            self.frame = video.Texture(self.renderer, size, target=True)
+        self.background = background
+        self.logical = pygame.Rect((0, 0), size)
+        self.textures = weakref.WeakKeyDictionary() # Surface: its texture
+        self.surface = None # Lazily made for canvas()
+        self.pushed_pixels = 0
+
+    def invalidate(self):
+        """ Forces the next frame to be drawn in full, nothing to do here """
+
+    def clear(self):
+        """ Erases the last frame """
+        if self.frame is not None:
+            self.renderer.target = self.frame
+        if self.background is None:
+            return
+        if isinstance(self.background, pygame.Surface):
+            self.blit(self.background, (0, 0))
+        else:
+            self.renderer.draw_color = pygame.Color(self.background)
+            self.renderer.clear()
+
+    def texture(self, surf):
+        """ Returns the texture of a surface, uploading it on first use """
+        texture = self.textures.get(surf)
+        if texture is None:
+            texture = self.textures[surf] = video.Texture.from_surface(self.renderer, surf)
+        return texture
+
+    def blit(self, surf, rect):
+        """ Copies a surface's texture to a position, returns the region it covered """
+        x, y = rect[0], rect[1]
+        width, height = surf.get_size()
+        self.texture(surf).draw(dstrect=(x, y, width, height))
+        return pygame.Rect(x, y, width, height).clip(self.logical)
+
+    def mark(self, rect):
+        """ Records a region that was drawn to the screen directly """
+
+    def rect(self, color, rect):
+        """ Draws a filled rectangle """
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.fill_rect(pygame.Rect(rect))
+
+    def present(self):
+        """ Sends the frame to the window """
+        if self.frame is not None:
+            self.renderer.target = None
+            self.frame.draw()
+        self.renderer.present()
+        width, height = self.window.size
+        self.pushed_pixels = width * height
+
+    def canvas(self):
+        """ Returns a surface to draw a whole screen on by hand, like the score screen """
+        if self.surface is None:
+            self.surface = pygame.Surface(self.logical.size)
+        return self.surface
+
+    def show_canvas(self):
+        """ Uploads what was drawn on canvas() and presents it """
+        self.renderer.target = None
+        self.renderer.draw_color = pygame.Color(0, 0, 0)
+        self.renderer.clear()
+        video.Texture.from_surface(self.renderer, self.surface).draw()
+        self.renderer.present()
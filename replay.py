@@ -0,0 +1,130 @@
+""" Records game input per simulation tick and replays it deterministically
+
+A recording holds the RNG seed, the simulation rate and, for every tick, the
+input bitmask and the spawn timer events that fired. Replaying feeds the same
+input to a fresh game with the same seed, so the game plays out exactly the
+same, either in real time in a window or headless as fast as possible. Usage:
+
+    python py_tut_with_images.py --record session.rec
+    python replay.py session.rec [--realtime]
+"""
+import argparse
+import struct
+import time
+import zlib
+
+import pygame
+
+import py_tut_with_images as game
+from controls import PressedKeys, key_bits
+
+# Version 1 recordings also spawned clouds from the game's random numbers
+MAGIC = b"PYREC2"
+# Magic, seed, simulation rate, number of ticks
+HEADER = struct.Struct("<6sQHI")
+# Timer events as stored in a recording
+EVENT_CODES = {game.ADDENEMY: 1}
+CODE_EVENTS = {code: event_type for event_type, code in EVENT_CODES.items()}
+
+
+class Recording:
+    """ Seed, simulation rate and per-tick (input bits, event codes) of a session """
+    def __init__(self, seed, sim_rate, ticks=None):
+        self.seed = seed
+        self.sim_rate = sim_rate
+        self.ticks = ticks if ticks is not None else []
+
+    def record(self, pressed_keys, events):
+        """ Appends one tick of input, only timer events are kept """
+        codes = bytes(EVENT_CODES[event.type] for event in events if event.type in EVENT_CODES)
+        self.ticks.append((key_bits(pressed_keys), codes))
+
+    def save(self, path):
+        """ Writes the header and the zlib-compressed ticks, one bits byte,
+        one event count byte and the event codes per tick """
+        body = bytearray()
+        for bits, codes in self.ticks:
+            body.append(bits)
+            body.append(len(codes))
+            body += codes
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, self.seed, self.sim_rate, len(self.ticks)))
+            file.write(zlib.compress(bytes(body), 9))
+
+
+def load(path):
+    """ Reads a recording written by Recording.save() """
+    with open(path, "rb") as file:
+        magic, seed, sim_rate, count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a game recording")
+        body = zlib.decompress(file.read())
+
+    ticks = []
+    offset = 0
+    for _ in range(count):
+        bits, length = body[offset], body[offset + 1]
+        ticks.append((bits, body[offset + 2:offset + 2 + length]))
+        offset += 2 + length
+    return Recording(seed, sim_rate, ticks)
+
+
+def replay(recording, realtime=False, event_log_path=None):
+    """ Plays a recording back and returns the scores of every game in it
+
+    In real time it is drawn in a window at the recorded rate, otherwise it
+    runs headless with rendering skipped.
+    """
+    game.init_game(headless=not realtime, seed=recording.seed, sim_rate=recording.sim_rate,
+                   event_log_path=event_log_path)
+    events = {code: pygame.event.Event(event_type) for code, event_type in CODE_EVENTS.items()}
+    scores = []
+
+    begin = time.perf_counter()
+    for bits, codes in recording.ticks:
+        game.run_tick(PressedKeys(bits), [events[code] for code in codes])
+
+        # Go straight on to the next game, like pressing enter on the score screen
+        if game.score_screen:
+            scores.append(game.final_score)
+            game.score_screen = False
+            game.won = False
+
+        if realtime:
+            if pygame.event.get(pygame.QUIT):
+                break
+            game.draw_world()
+            game.renderer.present()
+            game.clock.tick(recording.sim_rate)
+    elapsed = time.perf_counter() - begin
+    game.event_log.close()
+
+    sim_seconds = len(recording.ticks) / recording.sim_rate
+    return {
+        "ticks": len(recording.ticks),
+        "sim_seconds": sim_seconds,
+        "wall_seconds": elapsed,
+        "speedup": sim_seconds / elapsed if elapsed > 0 else float("inf"),
+        "scores": scores,
+        "score": game.player.score, # Score of the game still running at the end
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--realtime", action="store_true", help="watch the replay in a window")
+    parser.add_argument("--event-log", help="write the replayed game events here as JSON Lines")
+    args = parser.parse_args()
+
+    recording = load(args.path)
+    result = replay(recording, args.realtime, args.event_log)
+    print(
+        f"seed {recording.seed}: {result['ticks']} ticks ({result['sim_seconds']:.1f} s) replayed in "
+        f"{result['wall_seconds']:.3f} s, {result['speedup']:.0f}x real time"
+    )
+    print(f"finished games {result['scores']}, last game at {result['score']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import heapq
+import itertools
+
+
+class Timer:
+    """ Handle of a scheduled callback, pass it to Scheduler.cancel() to call it off """
+    __slots__ = ("due", "callback", "args", "name", "active")
+
+    def __init__(self, due, callback, args, name):
+        self.due = due # Tick the callback runs on
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.active = True # False once fired or cancelled
+
+
+class Scheduler:
+    """ Runs callbacks on later simulation ticks
+
+    Timers wait in a heap ordered by the tick they are due, so a waiting timer
+    costs nothing per tick and advance() only touches the ones that are due.
+    Every timer fires at most once, a repeating timer schedules itself again
+    from its callback. Cancelled timers stay in the heap until they reach the
+    top and are skipped there.
+    """
+    def __init__(self, tick_seconds):
+        self.tick_seconds = tick_seconds
+        self.tick = 0 # Ticks advanced so far
+        self.heap = [] # (due tick, order, timer)
+        self.order = itertools.count() # Timers due on the same tick fire in the order they were set
+        self.pending = 0
+
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+
+    def ticks(self, seconds):
+        """ Converts seconds to whole ticks, at least one so nothing fires on the tick it is set """
+        return max(1, round(seconds / self.tick_seconds))
+
+    def after(self, seconds, callback, *args, name=None):
+        """ Calls callback(*args) once, seconds of simulation time from now """
+        return self.at(self.tick + self.ticks(seconds), callback, *args, name=name)
+
+    def at(self, tick, callback, *args, name=None):
+        """ Calls callback(*args) once on the given tick, or the next one if it has passed """
+        timer = Timer(tick, callback, args, name or callback.__qualname__)
+        heapq.heappush(self.heap, (tick, next(self.order), timer))
+        self.pending += 1
+        self.scheduled += 1
+        return timer
+
+    def cancel(self, timer):
+        """ Calls off a timer, timers that already fired or None are ignored """
+        if timer is not None and timer.active:
+            timer.active = False
+            self.pending -= 1
+            self.cancelled += 1
+
+    def advance(self):
+        """ Moves on one tick and fires every timer due by then, returns how many fired """
+        self.tick += 1
+        heap = self.heap
+        fired = 0
+        while heap and heap[0][0] <= self.tick:
+            timer = heapq.heappop(heap)[2]
+            if not timer.active:
+                continue
+            timer.active = False
+            self.pending -= 1
+            timer.callback(*timer.args)
+            fired += 1
+        self.fired += fired
+        return fired
+
+    def remaining(self, timer):
+        """ Returns the ticks until a timer fires, None if it is not pending """
+        return timer.due - self.tick if timer.active else None
+
+    def clear(self):
+        """ Cancels every pending timer, used on game reset """
+        for _, _, timer in self.heap:
+            timer.active = False
+        self.cancelled += self.pending
+        self.heap = []
+        self.pending = 0
+
+    def upcoming(self, count=10):
+        """ Returns (ticks until due, name) of the next pending timers, soonest first """
+        due = heapq.nsmallest(count, (entry for entry in self.heap if entry[2].active))
+        return [(tick - self.tick, timer.name) for tick, _, timer in due]
+
+    def stats(self):
+        """ Returns the timer counters and when the next timer is due """
+        upcoming = self.upcoming(1)
+        return {
+            "pending": self.pending,
+            "scheduled": self.scheduled,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "next_in": upcoming[0][0] if upcoming else None,
+        }
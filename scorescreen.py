@@ -1,47 +1,107 @@
 from os import write
+import time
+
 import pygame
 from pygame.locals import *
 
+from text import TextCache
+
 score_screen = True
-font = pygame.font.SysFont(None, 32)
-clock = pygame.time.Clock()
-FRAMERATE = 10
+text_cache = TextCache()
+FONT_SIZE = 32
+TEXT_COLOR = (255, 255, 255)
+# The row of the game that just ended in the high score table
+NEW_SCORE_COLOR = (255, 215, 0)
+# Longest ms wait_event() sleeps in one go, waking up now and then lets
+# Python run signal handlers like Ctrl+C
+IDLE_TIMEOUT = 1000
+# Video drivers SDL can sleep on until an event comes, on the others (dummy,
+# kmsdrm) event.wait() checks every millisecond, so they are polled slower
+BLOCKING_DRIVERS = ("x11", "wayland", "windows", "cocoa")
+POLL_INTERVAL = 50
+# Events that close the game and events after which the window has to be
+# drawn again. All but QUIT and VIDEOEXPOSE came with pygame 2.0.1 and are
+# left out on older versions
+QUIT_EVENTS = tuple(getattr(pygame, name) for name in ("QUIT", "WINDOWCLOSE") if hasattr(pygame, name))
+REDRAW_EVENTS = tuple(getattr(pygame, name) for name in (
+    "VIDEOEXPOSE", "WINDOWEXPOSED", "WINDOWSIZECHANGED", "RENDER_TARGETS_RESET", "RENDER_DEVICE_RESET",
+) if hasattr(pygame, name))
 
 
-def text_objects(text):
+def text_objects(text, color=TEXT_COLOR):
     """Function that returns data of text"""
-    textSurface = font.render(text, True, (255, 255, 255))
+    textSurface = text_cache.render(text, color, FONT_SIZE)
     return textSurface, textSurface.get_rect()
 
 
-def write_to_screen(screen, msg, y_displacement=0):
+def write_to_screen(screen, msg, y_displacement=0, color=TEXT_COLOR):
     """Function to write text on screen"""
-    textSurface, textRect = text_objects(msg)
-    textRect.center = (screen.get_rect().center[0], screen.get_rect().center[1] + y_displacement)
+    textSurface, textRect = text_objects(msg, color)
+    center_x, center_y = screen.get_rect().center
+    textRect.center = (center_x, center_y + y_displacement)
     screen.blit(textSurface, textRect)
 
 
-def display_screen(screen, score, won):
-    # Handle events for quit and return to game
-    for event in pygame.event.get():
-        if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
-            # Return values for score_screen and running variables in main file
-            return (False, False, False)
+def wait_event():
+    """Sleeps until the next event comes, returns a NOEVENT event after IDLE_TIMEOUT ms"""
+    if pygame.display.get_driver() in BLOCKING_DRIVERS:
+        return pygame.event.wait(IDLE_TIMEOUT)
+    for _ in range(IDLE_TIMEOUT // POLL_INTERVAL):
+        event = pygame.event.poll()
+        if event.type != NOEVENT:
+            return event
+        pygame.time.wait(POLL_INTERVAL)
+    return pygame.event.Event(NOEVENT)
+
+
+def draw_table(screen, table, new, y_displacement):
+    """Draws the high score rows from y_displacement down, new in its own color"""
+    line = text_cache.font(FONT_SIZE).get_linesize()
+    write_to_screen(screen, "High scores", y_displacement)
+    for rank, row in enumerate(table, 1):
+        score, stamp = row[0], -row[1]
+        date = time.strftime("%Y-%m-%d", time.localtime(stamp))
+        color = NEW_SCORE_COLOR if row == new else TEXT_COLOR
+        write_to_screen(screen, f"{rank}.  {score}  {date}", y_displacement + rank * line, color)
 
-        if event.type == KEYDOWN and event.key == K_RETURN:
-            return (False, True, False)
 
+def draw_screen(screen, score, won, table=None, new=None):
+    """Draws the result, the score, the high scores if there is a table and how to go on"""
     # Fill screen with black
     screen.fill((0, 0, 0))
 
+    # Everything moves up to make room for the table
+    top = -50 if table is None else -200
     if won:
-        write_to_screen(screen, "YOU WIN", -50)
+        write_to_screen(screen, "YOU WIN", top)
     else:
-        write_to_screen(screen, "GAME OVER", -50)
-    write_to_screen(screen, f'Score: {score}', 50)
-    write_to_screen(screen, "Press enter to continue", screen.get_height()/2 - font.get_linesize())
+        write_to_screen(screen, "GAME OVER", top)
+    write_to_screen(screen, f'Score: {score}', 50 if table is None else top + 50)
+    if table is not None:
+        draw_table(screen, table, new, top + 110)
+    write_to_screen(screen, "Press enter to continue", screen.get_height()/2 - text_cache.font(FONT_SIZE).get_linesize())
 
-    pygame.display.flip()
-    clock.tick(FRAMERATE)
 
-    return (True, True, won)
+def display_screen(screen, score, won, show=pygame.display.flip, table=None, new=None):
+    """Shows the score screen until the player goes on or quits
+
+    Draws once, show() puts it on the display, and then sleeps in
+    wait_event() and only draws again when the window needs it. table is
+    the best scores as highscores.HighScores.top() returns them, new the
+    row of this game in it. Returns the new score_screen, running and won
+    values for the main file.
+    """
+    draw_screen(screen, score, won, table, new)
+    show()
+    while True:
+        event = wait_event()
+        if event.type in QUIT_EVENTS or (event.type == KEYDOWN and event.key == K_ESCAPE):
+            # Return values for score_screen and running variables in main file
+            return (False, False, False)
+
+        if event.type == KEYDOWN and event.key == K_RETURN:
+            return (False, True, False)
+
+        if event.type in REDRAW_EVENTS:
+            draw_screen(screen, score, won, table, new)
+            show()
@@ -0,0 +1,152 @@
+""" Packs the world into compact binary snapshots and deltas between them
+
+A snapshot is a fixed header, the entity counts, the state of the random
+number generator and then one section of fixed-layout records per entity
+type, in RECORDS order. Every record starts with the entity's place in the
+draw order. Timers are stored as the tick they are due, -1 for none, and
+their rank among the pending timers. A delta XORs every section against the
+same section of an older snapshot and compresses the result, so unchanged
+fields cost next to nothing.
+"""
+import struct
+import zlib
+from array import array
+from collections import deque
+
+MAGIC = b"PYSNP2"
+DELTA_MAGIC = b"PYDLT1"
+# Magic, tick, simulated ms, scheduler tick, last gunner spawn ms, boss exists,
+# gunner count, score screen, won, final score, has a gaussian, next gaussian
+HEADER = struct.Struct("<6sIdId?H??i?d")
+# Records per entity type, they all start with z, x, y
+RECORDS = {
+    "player": struct.Struct("<Hhhhid?iI"), # Health, score, cooldown, loaded, reload timer
+    "enemies": struct.Struct("<Hhhbb"), # Speed, direction
+    "bullets": struct.Struct("<Hhhb"), # Velocity
+    "explosions": struct.Struct("<HhhiI"), # Kill timer
+    "gunners": struct.Struct("<Hhh?"), # Moving up
+    "boss": struct.Struct("<Hhhh?iI"), # Health, moving up, attack timer
+    "attacks": struct.Struct("<Hhhb"), # Velocity
+    "powerups": struct.Struct("<Hhh??iI"), # Power is DMG, activated, expiry timer
+}
+COUNTS = struct.Struct(f"<{len(RECORDS)}H")
+# Mersenne Twister state, 624 words and the position in them
+RANDOM_WORDS = 625
+FIXED_SIZE = HEADER.size + COUNTS.size + RANDOM_WORDS * 4
+# Magic, checksum of the base snapshot, size of the snapshot
+DELTA = struct.Struct("<6sII")
+
+
+def encode(world):
+    """ Packs a world from capture_world() into bytes """
+    version, words, gauss = world["random"]
+    parts = [
+        HEADER.pack(MAGIC, *world["globals"], gauss is not None, gauss or 0.0),
+        COUNTS.pack(*(len(world[name]) for name in RECORDS)),
+        array("I", words).tobytes(),
+    ]
+    for name, record in RECORDS.items():
+        pack = record.pack
+        parts.append(b"".join([pack(*fields) for fields in world[name]]))
+    return b"".join(parts)
+
+
+def decode(data):
+    """ Unpacks a snapshot into the world dict encode() takes """
+    magic, *fields, has_gauss, gauss = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a world snapshot")
+    counts = COUNTS.unpack_from(data, HEADER.size)
+    # Checked before anything is unpacked, so a short file never half restores a world
+    if len(data) != FIXED_SIZE + sum(record.size * count for record, count in zip(RECORDS.values(), counts)):
+        raise ValueError("the snapshot is cut short")
+    offset = HEADER.size + COUNTS.size
+    words = array("I")
+    words.frombytes(data[offset:offset + RANDOM_WORDS * 4])
+    offset += RANDOM_WORDS * 4
+
+    world = {"globals": tuple(fields), "random": (3, tuple(words), gauss if has_gauss else None)}
+    for (name, record), count in zip(RECORDS.items(), counts):
+        end = offset + record.size * count
+        world[name] = list(record.iter_unpack(data[offset:end]))
+        offset = end
+    return world
+
+
+def sections(data):
+    """ Splits a snapshot into the fixed part and one section per entity type """
+    counts = COUNTS.unpack_from(data, HEADER.size)
+    parts = [data[:FIXED_SIZE]]
+    offset = FIXED_SIZE
+    for record, count in zip(RECORDS.values(), counts):
+        parts.append(data[offset:offset + record.size * count])
+        offset += record.size * count
+    return parts
+
+
+def xor(data, base):
+    """ XORs data with base cut or zero padded to the same length """
+    size = len(data)
+    base = base[:size].ljust(size, b"\0")
+    return (int.from_bytes(data, "little") ^ int.from_bytes(base, "little")).to_bytes(size, "little")
+
+
+def delta(base, data):
+    """ Encodes data as the difference to an older snapshot base """
+    body = b"".join(xor(part, base_part) for part, base_part in zip(sections(data), sections(base)))
+    return DELTA.pack(DELTA_MAGIC, zlib.crc32(base), len(data)) + zlib.compress(body, 1)
+
+
+def apply(base, change):
+    """ Rebuilds the snapshot a delta was made from, given the same base """
+    magic, checksum, size = DELTA.unpack_from(change)
+    if magic != DELTA_MAGIC:
+        raise ValueError("not a snapshot delta")
+    if checksum != zlib.crc32(base):
+        raise ValueError("the delta was made against another snapshot")
+    body = zlib.decompress(change[DELTA.size:])
+    if len(body) != size:
+        raise ValueError("the delta is damaged")
+
+    # The fixed part holds the counts, which give the size of every section
+    fixed = xor(body[:FIXED_SIZE], base[:FIXED_SIZE])
+    counts = COUNTS.unpack_from(fixed, HEADER.size)
+    parts = [fixed]
+    offset = FIXED_SIZE
+    for record, count, base_part in zip(RECORDS.values(), counts, sections(base)[1:]):
+        end = offset + record.size * count
+        parts.append(xor(body[offset:end], base_part))
+        offset = end
+    return b"".join(parts)
+
+
+class RollbackBuffer:
+    """ Keeps a snapshot per tick for the last ticks ticks to step back to
+
+    Entries go by their tick rather than their number, so the window is the
+    same at any frame rate.
+    """
+    def __init__(self, ticks=120):
+        self.ticks = ticks
+        self.snapshots = deque() # (tick, snapshot)
+
+    def newest(self):
+        """ Returns the tick of the last snapshot, None if empty """
+        return self.snapshots[-1][0] if self.snapshots else None
+
+    def push(self, tick, data):
+        self.snapshots.append((tick, data))
+        while self.snapshots[0][0] < tick - self.ticks:
+            self.snapshots.popleft()
+
+    def rewind(self, ticks):
+        """ Drops the snapshots newer than ticks ago and returns (tick, snapshot) of the one left, None if empty """
+        if not self.snapshots:
+            return None
+        newest = self.snapshots[-1][0]
+        while len(self.snapshots) > 1 and self.snapshots[-1][0] > newest - ticks:
+            self.snapshots.pop()
+        return self.snapshots[-1]
+
+    def clear(self):
+        self.snapshots.clear()
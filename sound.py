@@ -0,0 +1,111 @@
+import time
+
+import pygame
+
+
+class SoundManager:
+    """ Plays preloaded sounds on a fixed pool of mixer channels
+
+    Triggers of the same sound within its window are dropped instead of
+    restarting the sample. When every channel is busy, a sound takes over the
+    channel playing the lowest priority sound if that is below its own,
+    otherwise the trigger is dropped.
+    """
+    def __init__(self, channels=8, clock=time.perf_counter):
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(index) for index in range(channels)]
+        self.playing = [None] * channels # Name of the sound each channel was last given
+        self.clock = clock # Seconds, used for rate limiting
+        self.sounds = {} # name: (Sound, priority, window)
+        self.last_played = {}
+        self.pending = {} # name: (decode future, volume, priority, window)
+
+        self.played = {}
+        self.limited = {} # Dropped because the sound played within its window
+        self.no_channel = {} # Dropped because no channel could be taken
+        self.stolen = {} # Played by cutting off a lower priority sound
+
+    def load(self, name, filename, volume=0.5, priority=0, window=0.05):
+        """ Decodes a sound, window is the shortest time in seconds between two plays """
+        self.add(name, pygame.mixer.Sound(filename), volume, priority, window)
+
+    def add(self, name, sound, volume=0.5, priority=0, window=0.05):
+        """ Registers an already decoded sound """
+        sound.set_volume(volume)
+        self.sounds[name] = (sound, priority, window)
+        self.last_played[name] = float("-inf")
+        for counter in (self.played, self.limited, self.no_channel, self.stolen):
+            counter[name] = 0
+
+    def load_all(self, table):
+        """ Loads every sound in a table of name: (file, volume, priority, window) """
+        for name, (filename, volume, priority, window) in table.items():
+            self.load(name, filename, volume, priority, window)
+
+    def start_loading(self, executor, table):
+        """ Queues every sound in a table for decoding on the executor, the mixer must be initialized """
+        self.pending = {
+            name: (executor.submit(pygame.mixer.Sound, filename), volume, priority, window)
+            for name, (filename, volume, priority, window) in table.items()
+        }
+
+    def finish_loading(self):
+        """ Waits for the queued decodes and registers the sounds """
+        for name, (future, volume, priority, window) in self.pending.items():
+            self.add(name, future.result(), volume, priority, window)
+        self.pending = {}
+
+    def play(self, name):
+        """ Plays a sound unless it is rate limited or no channel is free """
+        sound, priority, window = self.sounds[name]
+        now = self.clock()
+        if now - self.last_played[name] < window:
+            self.limited[name] += 1
+            return None
+
+        index = self._free_channel(priority)
+        if index is None:
+            self.no_channel[name] += 1
+            return None
+        if self.channels[index].get_busy():
+            self.stolen[name] += 1
+
+        channel = self.channels[index]
+        channel.play(sound)
+        self.playing[index] = name
+        self.last_played[name] = now
+        self.played[name] += 1
+        return channel
+
+    def _free_channel(self, priority):
+        """ Returns an idle channel, or the one playing the least important sound below priority """
+        lowest = None
+        lowest_priority = priority
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+            playing_priority = self.sounds[self.playing[index]][1]
+            if playing_priority < lowest_priority:
+                lowest = index
+                lowest_priority = playing_priority
+        return lowest
+
+    def stop(self, name):
+        """ Stops every channel playing a sound """
+        sound = self.sounds[name][0]
+        for index, channel in enumerate(self.channels):
+            if self.playing[index] == name and channel.get_sound() is sound:
+                channel.stop()
+        self.last_played[name] = float("-inf")
+
+    def stats(self):
+        """ Returns the played and dropped counters per sound """
+        return {
+            name: {
+                "played": self.played[name],
+                "limited": self.limited[name],
+                "no_channel": self.no_channel[name],
+                "stolen": self.stolen[name],
+            }
+            for name in self.sounds
+        }
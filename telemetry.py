@@ -0,0 +1,81 @@
+import json
+import struct
+import time
+
+from writer import BatchWriter
+
+# Event kinds, their index is the kind code in binary logs
+# value is the score for kills and deaths, the health left for hits, the
+# power-up code for power-ups, the boss health for boss spawns and hits and
+# the load shedding level for governor changes
+KINDS = ("kill", "gunner_kill", "hit", "powerup", "boss_spawn", "boss_hit", "boss_kill", "death", "governor")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# Binary record: kind, frame, unix time, value, x, y
+RECORD = struct.Struct("<BIdihh")
+
+
+class EventLog:
+    """ Structured game-event log written by a background thread
+
+    log() only appends to a bounded in-memory queue, so the game loop never
+    waits on I/O. A BatchWriter thread drains the queue in batches every
+    flush_interval seconds (or sooner when half full) as JSON Lines or fixed
+    RECORD structs. When the queue is full new events are dropped and counted.
+    Without a path the log is disabled and log() returns at once.
+    """
+    def __init__(self, path=None, format="jsonl", capacity=4096, flush_interval=0.5):
+        self.path = path
+        self.enabled = path is not None
+        self.format = format
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.writer = None
+        if self.enabled:
+            self.file = open(path, "wb" if format == "binary" else "w")
+            self.writer = BatchWriter(self._write, "event-log", flush_interval)
+
+    def log(self, kind, frame, value=0, position=(0, 0)):
+        """ Queues an event, value is a score or health and position where it happened """
+        if not self.enabled:
+            return
+        if len(self.writer) >= self.capacity:
+            self.dropped += 1
+            return
+        self.writer.put((kind, frame, time.time(), value, position))
+        self.logged += 1
+        if len(self.writer) >= self.capacity // 2:
+            self.writer.flush()
+
+    def _write(self, batch):
+        if self.format == "binary":
+            self.file.write(b"".join(
+                RECORD.pack(KIND_CODES[kind], frame, stamp, value, int(x), int(y))
+                for kind, frame, stamp, value, (x, y) in batch
+            ))
+        else:
+            self.file.write("".join(
+                json.dumps({"event": kind, "frame": frame, "time": stamp, "value": value, "x": x, "y": y}) + "\n"
+                for kind, frame, stamp, value, (x, y) in batch
+            ))
+        self.file.flush()
+        self.written += len(batch)
+
+    def close(self):
+        """ Writes whatever is still queued and stops the writer thread """
+        if not self.enabled:
+            return
+        self.writer.close()
+        self.file.close()
+        self.enabled = False
+
+
+def read_binary(path):
+    """ Yields the events of a binary log as dicts """
+    with open(path, "rb") as file:
+        data = file.read()
+    for code, frame, stamp, value, x, y in RECORD.iter_unpack(data):
+        yield {"event": KINDS[code], "frame": frame, "time": stamp, "value": value, "x": x, "y": y}
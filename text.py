@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """ Renders text once and hands out the cached surfaces
+
+    render() keeps whole strings in an LRU cache keyed by text, color and size,
+    which suits labels that rarely change. draw() blits cached single-character
+    glyphs instead, so fast-changing numbers like the score never rasterize
+    anything after their digits have been seen once.
+    """
+    def __init__(self, font_name=None, capacity=128):
+        self.font_name = font_name # None uses pygame's default font
+        self.capacity = capacity # Most rendered strings kept
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.glyphs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        """ Returns the font for a size, loading it on first use """
+        font = self.fonts.get(size)
+        if font is None:
+            if self.font_name is None:
+                font = pygame.font.Font(None, size)
+            else:
+                font = pygame.font.SysFont(self.font_name, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, color, size):
+        """ Returns a cached surface of text, never modify it in place """
+        key = (text, color, size)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = self.font(size).render(text, True, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def glyph(self, char, color, size):
+        """ Returns the cached surface of a single character """
+        key = (char, color, size)
+        surf = self.glyphs.get(key)
+        if surf is None:
+            surf = self.glyphs[key] = self.font(size).render(char, True, color)
+        return surf
+
+    def draw(self, blit, text, color, size, topleft):
+        """ Draws text glyph by glyph with blit(surf, position), returns the x after the text """
+        x, y = topleft
+        for char in text:
+            surf = self.glyph(char, color, size)
+            blit(surf, (x, y))
+            x += surf.get_width()
+        return x
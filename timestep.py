@@ -0,0 +1,35 @@
+class FixedTimestep:
+    """ Accumulator that turns variable frame times into fixed simulation ticks
+
+    Every rendered frame adds its duration with advance(), which returns how
+    many ticks to simulate before drawing. Whatever is left over is exposed as
+    alpha, the fraction of a tick to interpolate positions by when rendering.
+    At most max_ticks run per frame, anything beyond that is dropped so a slow
+    machine does not fall further and further behind.
+    """
+    def __init__(self, rate, max_ticks=5):
+        self.rate = rate # Simulation ticks per second
+        self.dt = 1 / rate # Seconds per tick
+        self.max_ticks = max_ticks
+        self.accumulator = 0
+        self.dropped = 0 # Ticks skipped because a frame ran too long
+
+    def advance(self, elapsed):
+        """ Adds elapsed seconds and returns the number of ticks to run """
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.dt)
+        if ticks > self.max_ticks:
+            self.dropped += ticks - self.max_ticks
+            ticks = self.max_ticks
+            self.accumulator = ticks * self.dt
+        self.accumulator -= ticks * self.dt
+        return ticks
+
+    @property
+    def alpha(self):
+        """ How far the render time is into the next tick, from 0 to 1 """
+        return self.accumulator / self.dt
+
+    def reset(self):
+        """ Forgets accumulated time, e.g. after a pause """
+        self.accumulator = 0
@@ -0,0 +1,62 @@
+import threading
+from collections import deque
+
+
+class BatchWriter:
+    """ Hands queued items to write() in batches on a background thread
+
+    put() only appends to an in-memory queue, so the caller never waits on
+    I/O. The thread drains the queue every flush_interval seconds, or sooner
+    after flush(), and passes everything it took to write() as one list.
+    start(), if given, runs on the thread before the first batch. close()
+    stops the thread and writes what is left on the calling thread.
+    """
+    def __init__(self, write, name, flush_interval, start=None):
+        self.write = write
+        self.flush_interval = flush_interval
+        self.start = start
+        self.pending = deque()
+        self.wake = threading.Event()
+        self.closing = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def put(self, item):
+        """ Queues an item for the next batch """
+        self.pending.append(item)
+
+    def flush(self):
+        """ Wakes the thread to write what is queued now instead of on its next round """
+        self.wake.set()
+
+    def _drain(self):
+        """ Takes every queued item off the queue """
+        batch = []
+        pending = self.pending
+        while pending:
+            batch.append(pending.popleft())
+        return batch
+
+    def _run(self):
+        if self.start is not None:
+            self.start()
+        while not self.closing:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            batch = self._drain()
+            if batch:
+                self.write(batch)
+
+    def close(self):
+        """ Stops the thread and writes whatever is still queued """
+        if self.closing:
+            return
+        self.closing = True
+        self.wake.set()
+        self.thread.join()
+        batch = self._drain()
+        if batch:
+            self.write(batch)